@@ -1,26 +1,99 @@
 # agent_cli.py
 import argparse
 import anyio
+import asyncio
+import json
 import logging
-from strands import Agent
-from strands.tools.mcp import MCPClient
-from mcp.client.sse import sse_client
+import os
+import sys
+
+from batch import run_batch, format_ndjson, DEFAULT_PARALLELISM
+from model_pool import ModelPool
+from startup import AGENT_STACK_MODULES, StartupPhases, import_modules, print_report
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("agent-cli")
 
+async def run_batch_file(args, tools):
+    """Run every query in a JSONL file concurrently and write NDJSON results"""
+    with open(args.batch, 'r') as f:
+        items = [json.loads(line) for line in f if line.strip()]
+    logger.info(f"Running {len(items)} batch items with parallelism {args.parallelism}")
+
+    from strands import Agent
+    from strands.tools.mcp import MCPClient
+    from mcp.client.sse import sse_client
+
+    model_pool = ModelPool()
+    # Tools per server; items that override server_url get their own connection
+    server_tools = {args.server: asyncio.get_running_loop().create_future()}
+    server_tools[args.server].set_result(tools)
+    clients = []
+
+    async def load_tools(server_url):
+        client = MCPClient(lambda: sse_client(server_url))
+        await asyncio.to_thread(client.start)
+        clients.append(client)
+        return await asyncio.to_thread(client.list_tools_sync)
+
+    async def run_item(item):
+        # Each item gets its own agent; items for the same server share its connection
+        server_url = item.get("server_url", args.server)
+        if server_url not in server_tools:
+            server_tools[server_url] = asyncio.ensure_future(load_tools(server_url))
+        item_tools = await asyncio.shield(server_tools[server_url])
+
+        model_id = item.get("model_id", args.model)
+        model = await asyncio.to_thread(model_pool.get, model_id, item.get("region", args.region)) if model_id else None
+        agent = Agent(model=model, tools=item_tools, callback_handler=None)
+        response = await agent.invoke_async(item["query"])
+        return str(response)
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        async for result in run_batch(items, run_item, args.parallelism):
+            output.write(format_ndjson(result))
+            output.flush()
+    finally:
+        if args.output:
+            output.close()
+        for future in server_tools.values():
+            try:
+                await future
+            except Exception:
+                continue
+        for client in clients:
+            client.stop(None, None, None)
+
 async def main():
     parser = argparse.ArgumentParser(description='Strands Agent CLI with MCP Tools')
     parser.add_argument('--server', type=str, default='https://mcp-pg.agentic-ai-aws.com/sse', 
                         help='MCP server URL to connect to')
     parser.add_argument('--verbose', action='store_true', help='Enable verbose logging')
+    parser.add_argument('--batch', type=str, help='JSONL file of {"query": ...} items to run concurrently')
+    parser.add_argument('--parallelism', type=int, default=DEFAULT_PARALLELISM,
+                        help='Batch items to run at once')
+    parser.add_argument('--output', type=str, help='Write batch results to this file instead of stdout')
+    parser.add_argument('--model', type=str, help='Bedrock model ID for batch items that do not set one')
+    parser.add_argument('--region', type=str, default='us-west-2', help='AWS region for the model')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Report import and initialization times, then exit')
     
     args = parser.parse_args()
     
     if args.verbose:
         logger.setLevel(logging.DEBUG)
     
+    if args.profile_startup:
+        print_report("agent_cli", profile_startup(args), cwd=os.path.dirname(os.path.abspath(__file__)))
+        return
+
+    # Imported after argument parsing so --help and usage errors return immediately
+    from strands import Agent
+    from strands.tools.mcp import MCPClient
+    from mcp.client.sse import sse_client
+
     logger.info(f"Connecting to MCP server: {args.server}")
     
     try:
@@ -32,6 +105,10 @@ async def main():
             logger.info("Fetching available tools...")
             tools = sse_mcp_client.list_tools_sync()
             
+            if args.batch:
+                await run_batch_file(args, tools)
+                return
+
             # Create an agent with these tools
             logger.info("Creating agent with MCP tools")
             agent = Agent(tools=tools)
@@ -54,6 +131,26 @@ async def main():
         import traceback
         traceback.print_exc()
 
+def profile_startup(args):
+    """Time the agent stack imports and the first MCP round trip"""
+    phases = StartupPhases()
+    for name, seconds in import_modules(AGENT_STACK_MODULES).items():
+        phases.add(f"import {name}", seconds)
+
+    from strands.tools.mcp import MCPClient
+    from mcp.client.sse import sse_client
+
+    client = MCPClient(lambda: sse_client(args.server))
+    try:
+        with phases.phase(f"connect {args.server}"):
+            client.start()
+        with phases.phase("list tools"):
+            client.list_tools_sync()
+        client.stop(None, None, None)
+    except Exception as e:
+        logger.warning(f"MCP server not reachable, connection not profiled: {str(e)}")
+    return phases
+
 def cli():
     """Command-line interface for the Strands Agent"""
     anyio.run(main, backend="asyncio")
@@ -0,0 +1,206 @@
+# agent_pool.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("strands-agent-api.agent-pool")
+
+# Ready agents kept per (servers, model, region) template; 0 disables the pool
+DEFAULT_SIZE = int(os.environ.get("AGENT_POOL_SIZE", "2"))
+# Maximum number of templates kept warm; the least recently used are dropped beyond this
+DEFAULT_MAX_TEMPLATES = int(os.environ.get("AGENT_POOL_MAX_TEMPLATES", "20"))
+# Seconds a template may go unused before its agents are dropped
+DEFAULT_IDLE_TIMEOUT = int(os.environ.get("AGENT_POOL_IDLE_TIMEOUT", "600"))
+# Seconds between checks for idle templates
+DEFAULT_CHECK_INTERVAL = int(os.environ.get("AGENT_POOL_CHECK_INTERVAL", "60"))
+
+# (server URLs, model ID, region)
+TemplateKey = Tuple[Tuple[str, ...], str, str]
+
+
+class PooledAgent:
+    """An empty agent together with the pooled MCP connections its tools use"""
+
+    __slots__ = ("agent", "server_urls", "degraded", "created_at")
+
+    def __init__(self, agent, server_urls: List[str], degraded: Dict[str, str]):
+        self.agent = agent
+        # Servers whose connections this agent holds a reference on
+        self.server_urls = server_urls
+        self.degraded = degraded
+        self.created_at = time.time()
+
+
+class Template:
+    """Ready agents for one template and the bookkeeping to refill them"""
+
+    def __init__(self):
+        self.ready: Deque[PooledAgent] = deque()
+        self.last_used = time.monotonic()
+        self.refill: Optional[asyncio.Task] = None
+        # Bumped on invalidation so agents built from stale tools are not kept
+        self.generation = 0
+
+
+class AgentPool:
+    """Keeps a few pre-built, empty agents per (servers, model, region) template.
+
+    take hands out a ready agent, which then belongs to the caller, and refills
+    the template in the background. A miss returns None and the caller builds its
+    own agent. Templates are created on first use and dropped when idle, when
+    their servers' tools change, or beyond max_templates. build creates a
+    PooledAgent for a template key; discard releases one that is not handed out.
+    """
+
+    def __init__(
+        self,
+        build: Callable[[TemplateKey], Awaitable[PooledAgent]],
+        discard: Callable[[PooledAgent], None],
+        size: int = DEFAULT_SIZE,
+        max_templates: int = DEFAULT_MAX_TEMPLATES,
+        idle_timeout: int = DEFAULT_IDLE_TIMEOUT,
+        interval: int = DEFAULT_CHECK_INTERVAL,
+    ):
+        self.build = build
+        self.discard = discard
+        self.size = size
+        self.max_templates = max_templates
+        self.idle_timeout = idle_timeout
+        self.interval = interval
+        self._templates: "OrderedDict[TemplateKey, Template]" = OrderedDict()
+        # Invalidation arrives from MCP client threads as well as the event loop
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.built = 0
+        self.dropped = 0
+
+    @staticmethod
+    def key(server_urls: List[str], model_id: str, region: str) -> TemplateKey:
+        return tuple(server_urls), model_id, region
+
+    async def take(self, key: TemplateKey) -> Optional[PooledAgent]:
+        """Return a ready agent for key, or None if none is ready yet"""
+        if self.size <= 0:
+            return None
+
+        evicted = []
+        with self._lock:
+            template = self._templates.get(key)
+            if template is None:
+                template = self._templates[key] = Template()
+                while len(self._templates) > self.max_templates:
+                    _, oldest = self._templates.popitem(last=False)
+                    evicted.extend(self._drain(oldest))
+            self._templates.move_to_end(key)
+            template.last_used = time.monotonic()
+            pooled = template.ready.popleft() if template.ready else None
+            if pooled is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        self._release(evicted)
+        if template.refill is None or template.refill.done():
+            template.refill = asyncio.ensure_future(self._refill(key, template))
+        return pooled
+
+    async def _refill(self, key: TemplateKey, template: Template):
+        while True:
+            with self._lock:
+                if self._templates.get(key) is not template or len(template.ready) >= self.size:
+                    return
+                generation = template.generation
+
+            try:
+                pooled = await self.build(key)
+            except Exception as e:
+                logger.warning(f"Could not pre-build an agent for {key}: {str(e)}")
+                return
+
+            with self._lock:
+                keep = (
+                    self._templates.get(key) is template
+                    and template.generation == generation
+                    and not pooled.degraded
+                )
+                if keep:
+                    template.ready.append(pooled)
+                    self.built += 1
+            if not keep:
+                # A server that is down would leave the agent without its tools; sessions build their own
+                self.discard(pooled)
+                if pooled.degraded:
+                    return
+
+    def _drain(self, template: Template) -> List[PooledAgent]:
+        drained = list(template.ready)
+        template.ready.clear()
+        template.generation += 1
+        self.dropped += len(drained)
+        return drained
+
+    def _release(self, pooled_agents: List[PooledAgent]):
+        for pooled in pooled_agents:
+            try:
+                self.discard(pooled)
+            except Exception as e:
+                logger.error(f"Error discarding pooled agent: {str(e)}")
+
+    def invalidate(self, server_url: Optional[str] = None):
+        """Drop ready agents using server_url, or every ready agent when None"""
+        with self._lock:
+            drained = []
+            for key, template in self._templates.items():
+                if server_url is None or server_url in key[0]:
+                    drained.extend(self._drain(template))
+        self._release(drained)
+
+    def evict_idle(self) -> int:
+        """Drop templates unused for idle_timeout seconds; returns the number dropped"""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [key for key, template in self._templates.items() if template.last_used < cutoff]
+            drained = []
+            for key in idle:
+                drained.extend(self._drain(self._templates.pop(key)))
+        self._release(drained)
+        return len(idle)
+
+    async def run(self):
+        """Background loop that drops idle templates every interval seconds"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                self.evict_idle()
+            except Exception as e:
+                logger.error(f"Agent pool maintenance error: {str(e)}", exc_info=True)
+
+    def close(self):
+        """Drop every template and its ready agents"""
+        with self._lock:
+            drained = []
+            for template in self._templates.values():
+                if template.refill is not None:
+                    template.refill.cancel()
+                drained.extend(self._drain(template))
+            self._templates.clear()
+        self._release(drained)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": self.size,
+                "templates": len(self._templates),
+                "ready": sum(len(template.ready) for template in self._templates.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "built": self.built,
+                "dropped": self.dropped,
+            }
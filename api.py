@@ -2,30 +2,56 @@ import asyncio
 import logging
 import os
 import secrets
-import base64
-import json
 import re
-import markdown
-import concurrent.futures
+import time
+from collections import Counter
+from contextlib import aclosing, contextmanager
 from typing import Dict, List, Optional, Any
-from urllib.parse import urlencode
+from urllib.parse import urlencode, urlparse
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
 import anyio
-import requests
-from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Form, Depends, status
-from fastapi.responses import HTMLResponse, RedirectResponse, PlainTextResponse
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Request, Form, Depends, status, WebSocket, WebSocketDisconnect
+from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, PlainTextResponse, StreamingResponse, Response
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
-from starlette.middleware.sessions import SessionMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from strands import Agent
-from strands.tools.mcp import MCPClient
-from mcp.client.sse import sse_client
+
+from mcp_pool import MCPConnectionPool
+from agent_pool import AgentPool, PooledAgent
+from tool_cache import ToolCache
+from response_cache import ResponseCache
+from tool_result_cache import ToolResultCache
+from tool_limits import ToolCallLimiter
+from chat_history import ChatExchange, load_history, turn_usage
+from payload_store import PayloadStore
+from metrics import (
+    CONTENT_TYPE_LATEST, TURNS, InstrumentedThreadPoolExecutor, ModelCallMetrics,
+    record_span, render as render_metrics, setup_tracing, span
+)
+from streaming import stream_agent, format_sse
+from concurrency import ConcurrencyLimiter, QueueFullError
+from cancellation import TurnCancellation, TurnCancelledError
+from session_store import create_session_store
+from batch import (
+    run_batch, format_ndjson,
+    DEFAULT_PARALLELISM as BATCH_DEFAULT_PARALLELISM,
+    MAX_PARALLELISM as BATCH_MAX_PARALLELISM,
+    MAX_ITEMS as BATCH_MAX_ITEMS
+)
+from session_sweeper import SessionSweeper, DEFAULT_MAX_AGE
+from model_pool import MODEL_FACTORY, ModelPool
+from catalog import Catalog, CATALOG_MAX_AGE
+from server_registry import ServerRegistry
+from oauth_client import CognitoOAuthClient, OAuthError
+from token_verifier import TokenVerifier, InvalidTokenError
+from api_auth import BrowserSessionMiddleware, bearer_token
+from context_stats import ContextStats
+from startup import AGENT_STACK_MODULES, StartupPhases, import_modules, print_report
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -36,8 +62,14 @@ app = FastAPI(title="Strands Agent API")
 # Add middleware for compression
 app.add_middleware(GZipMiddleware, minimum_size=1000)
 
-# Create a thread pool executor for handling queries
-executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+# Agent turns run natively on the event loop; this caps how many run at once
+limiter = ConcurrencyLimiter()
+
+# Threads for the blocking I/O the agent stack still performs (Bedrock streaming, MCP connects)
+AGENT_IO_THREADS = int(os.environ.get("AGENT_IO_THREADS", "256"))
+
+# Exchanges per page of web chat history; earlier pages load as the user scrolls back
+HISTORY_PAGE_SIZE = int(os.environ.get("WEB_HISTORY_PAGE_SIZE", "20"))
 
 # Set up templates
 templates = Jinja2Templates(directory="templates")
@@ -45,8 +77,15 @@ templates = Jinja2Templates(directory="templates")
 # Mount static files
 app.mount("/static", StaticFiles(directory="templates"), name="static")
 
-# Store clients by session ID
-clients = {}
+# Serializable session state (server, model, history, agent messages), keyed by session ID.
+# Use SESSION_STORE=sqlite on a shared volume to serve sessions from any worker.
+session_store = create_session_store()
+
+# Agents built by this worker, keyed by session ID; rebuilt from the store when missing or stale
+session_agents = {}
+
+# Turns in progress on this worker per session ID; the sweeper leaves these sessions alone
+active_turns = Counter()
 
 # Cognito configuration
 COGNITO_DOMAIN = os.environ.get("COGNITO_DOMAIN", "<Cognito Domain>")
@@ -58,35 +97,126 @@ COGNITO_LOGOUT_URI = os.environ.get("COGNITO_LOGOUT_URI", "<app logout URL>/logo
 COGNITO_REGION = os.environ.get("AWS_REGION", "us-west-2")
 COGNITO_USER_POOL_ID = os.environ.get("COGNITO_USER_POOL_ID", "<User Pool ID>")
 
-# Add session middleware to the app
+# Local verification of Cognito tokens against the user pool's cached signing keys
+token_verifier = TokenVerifier(COGNITO_REGION, COGNITO_USER_POOL_ID, COGNITO_CLIENT_ID)
+
+# Shared keep-alive client for the Cognito OAuth endpoints, opened at startup
+oauth_client = CognitoOAuthClient(COGNITO_DOMAIN, COGNITO_CLIENT_ID, COGNITO_CLIENT_SECRET, COGNITO_REDIRECT_URI)
+
+# Logged-in browser users, keyed by the reference held in their session cookie.
+# Tokens stay server-side so the cookie is small.
+login_store = create_session_store(table="logins")
+LOGIN_MAX_COUNT = int(os.environ.get("LOGIN_MAX_COUNT", "100000"))
+
+# Add session middleware to the app; bearer-token requests bypass it
 app.add_middleware(
-    SessionMiddleware,
-    secret_key=secrets.token_urlsafe(32),
+    BrowserSessionMiddleware,
+    # Workers must share the key to read each other's cookies
+    secret_key=os.environ.get("SESSION_SECRET_KEY") or secrets.token_urlsafe(32),
     session_cookie="strands_session",
-    max_age=3600  # 1 hour
+    max_age=DEFAULT_MAX_AGE  # 1 hour unless SESSION_MAX_AGE is set
 )
 
 # Default MCP server URL
 DEFAULT_MCP_SERVER = "https://mcp-pg.agentic-ai-aws.com/sse"
 
-# Global MCP client and agent
-global_mcp_client = None
-global_agent = None
+# Seconds a multi-server session waits for each server's tools before leaving it out
+MCP_DISCOVERY_TIMEOUT = float(os.environ.get("MCP_DISCOVERY_TIMEOUT", "10"))
+
+# Tool lists per server, refreshed on MCP tools/list_changed notifications
+tool_cache = ToolCache()
+
+# Opt-in cache of agent responses to repeated questions; dropped when a server's tools change
+response_cache = ResponseCache()
+tool_cache.subscribe(response_cache.invalidate)
+
+# Function to look up a server's mcp_servers.json entry by URL
+def server_settings(server_url):
+    return next((server for server in server_registry.servers if server["url"] == server_url), None)
+
+# Per-server caps on concurrent MCP tool calls, each call with its own timeout
+tool_call_limiter = ToolCallLimiter(settings=server_settings)
+
+# Short-lived results of read-only MCP tool calls, with per-tool hit rates and latencies
+tool_result_cache = ToolResultCache(limiter=tool_call_limiter)
+tool_cache.subscribe(tool_result_cache.invalidate)
+
+# Pool of long-lived MCP connections shared by all sessions
+mcp_pool = MCPConnectionPool(tool_cache=tool_cache)
+mcp_pool_task = None
+
+# Configured MCP servers; readers use the in-memory snapshot, updates are atomic and locked
+server_registry = ServerRegistry(os.path.join(os.path.dirname(__file__), "mcp_servers.json"))
+server_registry_task = None
+
+# Pooled connections follow a server's new URL or its removal
+def on_server_changed(name, old, new):
+    if old is None:
+        return
+    if new is None or old.get("url") != new.get("url"):
+        mcp_pool.server_changed(old["url"], new["url"] if new else None)
+
+server_registry.subscribe(on_server_changed)
+
+# Background eviction of idle, expired and excess sessions
+session_sweeper = None
+session_sweeper_task = None
+login_sweeper = None
+login_sweeper_task = None
+
+# Default executor, instrumented for queue wait and saturation
+io_executor = None
+
+# Connections are opened on demand when connecting; optionally prewarm configured servers
+@app.on_event("startup")
+async def startup_event():
+    global mcp_pool_task, session_sweeper_task, login_sweeper_task, server_registry_task, agent_pool_task, io_executor
+
+    # Size the default executor for hundreds of concurrent, mostly I/O-bound turns
+    io_executor = InstrumentedThreadPoolExecutor(max_workers=AGENT_IO_THREADS)
+    asyncio.get_event_loop().set_default_executor(io_executor)
+
+    setup_tracing()
+
+    await oauth_client.start()
+    await token_verifier.start()
+
+    mcp_pool_task = asyncio.create_task(mcp_pool.run_maintenance())
+    session_sweeper_task = asyncio.create_task(session_sweeper.run())
+    login_sweeper_task = asyncio.create_task(login_sweeper.run())
+    server_registry_task = asyncio.create_task(server_registry.run())
+    agent_pool_task = asyncio.create_task(agent_pool.run())
+
+    # The server answers /health while the agent stack loads; agent routes wait for it
+    asyncio.ensure_future(ensure_agent_stack())
+
+    if os.environ.get("MCP_POOL_PREWARM", "false").lower() == "true":
+        loop = asyncio.get_event_loop()
+        loop.run_in_executor(None, mcp_pool.prewarm, [server["url"] for server in server_registry.servers])
 
-# No startup initialization - we'll initialize on demand when connecting
 @app.on_event("shutdown")
 async def shutdown_event():
-    global global_mcp_client, executor
-    
-    if global_mcp_client:
-        try:
-            logger.info("Shutting down MCP client")
-            global_mcp_client.__exit__(None, None, None)
-        except Exception as e:
-            logger.error(f"Error shutting down MCP client: {str(e)}")
-    
-    # Shutdown the executor
-    executor.shutdown(wait=False)
+    if mcp_pool_task:
+        mcp_pool_task.cancel()
+    if session_sweeper_task:
+        session_sweeper_task.cancel()
+    if login_sweeper_task:
+        login_sweeper_task.cancel()
+    if server_registry_task:
+        server_registry_task.cancel()
+    if agent_pool_task:
+        agent_pool_task.cancel()
+
+    # Pre-built agents hold references on pooled connections
+    agent_pool.close()
+
+    logger.info("Shutting down MCP connection pool")
+    mcp_pool.close_all()
+
+    session_store.close()
+    login_store.close()
+    await oauth_client.close()
+    await token_verifier.close()
 
 # Function to format response text with proper HTML
 def format_response(text):
@@ -94,78 +224,573 @@ def format_response(text):
     # Convert to string if it's not already a string
     text_str = str(text)
     
-    # Convert markdown to HTML
-    html = markdown.markdown(text_str)
-    
-    # Replace newlines with <br> tags for better formatting
-    html = html.replace('\n', '<br>')
+    with span("format"):
+        import markdown
+        import nh3
+
+        # Convert markdown to HTML
+        html = markdown.markdown(text_str)
+
+        # Replace newlines with <br> tags for better formatting
+        html = html.replace('\n', '<br>')
+
+        # Markdown passes raw HTML through, and tool output can steer what the
+        # model writes; only allowlisted tags and attributes are kept
+        html = nh3.clean(html)
     
     return html
 
-# Function to load models from model_tooluse.txt
-def load_supported_models():
-    """Load supported models from model_tooluse.txt file"""
-    models = {}
-    regions = set()
-    
-    # Path to model_tooluse.txt file
-    model_file_path = os.path.join(os.path.dirname(__file__), "model_tooluse.txt")
-    
+# Function to stream a session query and record it in the chat history
+async def stream_session_query(session_id, session, session_agent, query, user_id):
+    """Yield streaming events for one turn of the session's agent.
+
+    The turn runs in its own task. When the client goes away and the stream is
+    closed early, the turn is cancelled and winds down at the agent's next model
+    or tool boundary instead of being torn down in the middle of a call.
+    """
+    cancellation = TurnCancellation()
+    events = asyncio.Queue()
+    turn = asyncio.ensure_future(
+        run_streamed_turn(session_id, session, session_agent, query, user_id, cancellation, events.put_nowait)
+    )
     try:
-        with open(model_file_path, 'r') as file:
-            model_data = file.read()
-            
-            for line in model_data.strip().split('\n'):
-                parts = line.split('|')
-                if len(parts) >= 5:
-                    model_name = parts[0].strip()
-                    model_id = parts[2].strip()
-                    region = parts[3].strip()
-                    
-                    if model_name not in models:
-                        models[model_name] = {}
-                    
-                    models[model_name][region] = model_id
-                    regions.add(region)
-    except Exception as e:
-        logger.error(f"Error loading model data: {str(e)}")
-        return [], []
-    
-    # Format models for the UI
-    formatted_models = []
-    for model_name, region_data in models.items():
-        for region, model_id in region_data.items():
-            formatted_models.append({
-                "id": model_id,
-                "name": f"{model_name} ({region})",
-                "region": region
-            })
-    
-    return formatted_models, sorted(list(regions))
+        while True:
+            message = await events.get()
+            if message is None:
+                return
+            yield message
+    finally:
+        if not turn.done():
+            cancellation.cancel("disconnect")
+
+# Function to run one streamed turn, passing its events to emit and None when it is over
+async def run_streamed_turn(session_id, session, session_agent, query, user_id, cancellation, emit):
+    with track_turn(session_id):
+        try:
+            async with limiter.slot(user_id):
+                started = time.perf_counter()
+                messages = list(session_agent.messages)
+                async with cancellation:
+                    if cancellation.cancelled:
+                        raise cancellation.abandon(session_agent, messages)
+                    cancelled = False
+                    async for message in stream_agent(session_agent, query, cancellation.signal):
+                        if message["type"] == "done":
+                            record_span("turn", started)
+                            TURNS.labels("ok").inc()
+                            # Sanitized like the stored exchange; the web chat inserts it as HTML
+                            message["html"] = format_response(message["response"])
+                            save_exchange(
+                                session_id, session, session_agent, query, message["response"], message["html"],
+                                turn_usage(session_agent), (time.perf_counter() - started) * 1000
+                            )
+                        elif message["type"] == "cancelled":
+                            # The last event; the agent's stream is left to finish first
+                            cancelled = True
+                            continue
+                        elif message["type"] == "error":
+                            TURNS.labels("error").inc()
+                        emit(message)
+                    if cancelled:
+                        raise cancellation.abandon(session_agent, messages)
+        except QueueFullError as e:
+            TURNS.labels("rejected").inc()
+            emit({"type": "error", "error": str(e), "retry_after": e.retry_after})
+        except TurnCancelledError as e:
+            emit({"type": "error", "error": str(e), "cancelled": e.reason})
+        except Exception as e:
+            logger.error(f"Streaming error: {str(e)}", exc_info=True)
+            emit({"type": "error", "error": str(e)})
+        finally:
+            emit(None)
+
+# Models, loaded once and reloaded when model_tooluse.txt changes
+catalog = Catalog(os.path.join(os.path.dirname(__file__), "model_tooluse.txt"))
+
+# Function to check a client-supplied model and region against the catalog
+def model_available(model_id, region):
+    # The catalog lists Bedrock models; a MODEL_FACTORY stand-in serves any model ID
+    return bool(MODEL_FACTORY) or catalog.models.supports(model_id, region)
+
+# Bedrock model clients shared by every session using the same model and region
+model_pool = ModelPool(validate=model_available)
+
+# Token savings across every session's conversation manager
+context_stats = ContextStats()
+
+# Large tool results spilled from session memory when the conversation manager truncates them
+payload_store = PayloadStore()
+
+# Function to build the conversation manager that bounds a session's history
+def create_conversation_manager(model_id):
+    """Conversation manager with a token budget derived from the model's max tokens"""
+    from context_budget import TokenBudgetConversationManager, token_budget_for
+
+    return TokenBudgetConversationManager(
+        token_budget=token_budget_for(catalog.models.max_tokens(model_id)),
+        stats=context_stats,
+        payload_store=payload_store
+    )
+
+# Function to list the MCP servers a session is attached to
+def session_servers(session):
+    # Sessions stored before multi-server sessions only carry server_url
+    return session.get("server_urls") or [session["server_url"]]
+
+# Function to choose the tool name prefix for each server of a multi-server session
+def server_prefixes(server_urls):
+    """Prefix tools with the server's name in mcp_servers.json, or its host and port"""
+    names = {server["url"]: server["name"] for server in server_registry.servers}
+    prefixes = {}
+    for server_url in server_urls:
+        name = names.get(server_url) or urlparse(server_url).netloc or server_url
+        prefix = re.sub(r"[^A-Za-z0-9_-]", "_", name)
+        # Two URLs of one host, or servers registered under similar names
+        if prefix in prefixes.values():
+            prefix = f"{prefix}{len(prefixes) + 1}"
+        prefixes[server_url] = prefix
+    return prefixes
+
+# Function to attach to several MCP servers at once
+async def attach_servers(server_urls):
+    """Acquire pooled connections and fetch tools from all servers concurrently.
+
+    Returns the combined tools, the servers that answered and a reason for each
+    server that failed or missed MCP_DISCOVERY_TIMEOUT. A single server is waited
+    for as long as it takes; the call fails only if no server could be attached.
+    """
+    loop = asyncio.get_event_loop()
+
+    async def attach(server_url):
+        await loop.run_in_executor(None, mcp_pool.acquire, server_url)
+        try:
+            return await loop.run_in_executor(None, mcp_pool.get_tools, server_url)
+        except Exception:
+            mcp_pool.release(server_url)
+            raise
+
+    def release_late(server_url, task):
+        # A server that answered after the deadline must not keep a reference
+        if not task.cancelled() and task.exception() is None:
+            mcp_pool.release(server_url)
+
+    tasks = {server_url: asyncio.ensure_future(attach(server_url)) for server_url in server_urls}
+    timeout = MCP_DISCOVERY_TIMEOUT if len(tasks) > 1 else None
+    with span("tool_discovery", servers=len(tasks)):
+        await asyncio.wait(tasks.values(), timeout=timeout)
+
+    prefixes = server_prefixes(server_urls) if len(tasks) > 1 else {}
+    tools, attached, degraded = [], [], {}
+    first_error = None
+    for server_url, task in tasks.items():
+        if not task.done():
+            logger.warning(f"MCP server {server_url} did not list its tools within {MCP_DISCOVERY_TIMEOUT}s")
+            degraded[server_url] = f"No response within {MCP_DISCOVERY_TIMEOUT:g}s"
+            task.add_done_callback(lambda task, server_url=server_url: release_late(server_url, task))
+        elif task.exception() is not None:
+            logger.warning(f"MCP server {server_url} is unavailable: {str(task.exception())}")
+            degraded[server_url] = str(task.exception())
+            first_error = first_error or task.exception()
+        else:
+            tools.extend(tool_result_cache.wrap(server_url, task.result(), prefixes.get(server_url)))
+            attached.append(server_url)
+
+    if not attached:
+        raise first_error or TimeoutError(f"No MCP server responded within {MCP_DISCOVERY_TIMEOUT:g}s")
+    return tools, attached, degraded
+
+# Agent stack (Strands, the MCP client, Bedrock), imported in the background after startup
+agent_stack = None
+agent_stack_seconds = None
+
+# Function to import the agent stack off the event loop
+def load_agent_stack():
+    global agent_stack_seconds
+    timings = import_modules(AGENT_STACK_MODULES)
+    agent_stack_seconds = round(sum(timings.values()), 3)
+    logger.info(f"Agent stack loaded in {agent_stack_seconds:.2f}s")
+    return timings
+
+# Function to wait until the agent stack is importable without blocking the event loop
+async def ensure_agent_stack():
+    """Start loading the agent stack if needed and wait for it; /health keeps answering meanwhile"""
+    global agent_stack
+    if agent_stack is None:
+        agent_stack = asyncio.get_event_loop().run_in_executor(None, load_agent_stack)
+    await agent_stack
+
+# Function to build an empty session agent for a pool template
+async def build_session_agent(key):
+    """Attach to the template's servers and build an agent with their tools"""
+    await ensure_agent_stack()
+    from strands import Agent
+    from strands.tools.executors import ConcurrentToolExecutor
+
+    server_urls, model_id, region = key
+    tools, attached, degraded = await attach_servers(list(server_urls))
+    try:
+        # Creating a model's client is blocking botocore work
+        model = await asyncio.get_event_loop().run_in_executor(None, model_pool.get, model_id, region)
+        agent = Agent(
+            model=model,
+            tools=tools,
+            conversation_manager=create_conversation_manager(model_id),
+            # Independent tool uses of one model response run at once, within tool_call_limiter
+            tool_executor=ConcurrentToolExecutor(),
+            hooks=[ModelCallMetrics(model_id)]
+        )
+    except Exception:
+        for server_url in attached:
+            mcp_pool.release(server_url)
+        raise
+    return PooledAgent(agent, attached, degraded)
+
+# Function to release the MCP connections of an agent that will not be used
+def discard_pooled_agent(pooled):
+    for server_url in pooled.server_urls:
+        mcp_pool.release(server_url)
+
+# Pre-built session agents per (servers, model, region), refilled in the background
+agent_pool = AgentPool(build_session_agent, discard_pooled_agent)
+tool_cache.subscribe(agent_pool.invalidate)
+agent_pool_task = None
+
+# Function to get an empty session agent, from the pool when one is ready
+async def checkout_session_agent(server_urls, model_id, region):
+    key = AgentPool.key(server_urls, model_id, region)
+    pooled = await agent_pool.take(key)
+    if pooled is None:
+        pooled = await build_session_agent(key)
+    return pooled
+
+# Function to create a session backed by pooled MCP connections
+async def create_session(server_urls, region, model_id, user):
+    """Attach a new session to the pooled connections for server_urls and return its ID and degraded servers"""
+    if not model_available(model_id, region):
+        raise HTTPException(status_code=400, detail=f"Model {model_id} is not available in {region}")
+
+    # Generate session ID
+    import uuid
+    session_id = str(uuid.uuid4())
+
+    # Dedicated agent for this session, attached to (or reusing) the pooled MCP connections
+    server_urls = list(dict.fromkeys(server_urls))
+    logger.info(f"Attaching to MCP servers: {', '.join(server_urls)}")
+    pooled = await checkout_session_agent(server_urls, model_id, region)
+    logger.info(f"Available tools: {pooled.agent.tool_names}")
+
+    # Store the serializable session state
+    now = time.time()
+    session_store.put(session_id, {
+        "server_url": server_urls[0],
+        "server_urls": server_urls,
+        "degraded_servers": pooled.degraded,
+        "region": region,
+        "model_id": model_id,
+        "chat_history": [],
+        "messages": [],
+        "version": 0,
+        "user_id": user.get("id"),
+        "access_token": user.get("access_token"),
+        "created_at": now,
+        "last_active": now
+    })
+    session_agents[session_id] = {"agent": pooled.agent, "server_urls": pooled.server_urls, "version": 0, "last_used": now}
+
+    return session_id, pooled.degraded
+
+# Function to get the agent for a stored session on this worker
+async def get_session_agent(session_id, session):
+    """Return this worker's agent for the session, rebuilding it from the stored messages if needed"""
+    cached = session_agents.get(session_id)
+    if cached:
+        cached["last_used"] = time.time()
+        if cached["version"] != session["version"]:
+            # Another worker advanced the conversation; catch up from the store
+            cached["agent"].messages = session["messages"]
+            cached["version"] = session["version"]
+        return cached["agent"]
+
+    logger.info(f"Rehydrating agent for session {session_id}")
+    # Servers that were down when the session was created get another chance here
+    pooled = await checkout_session_agent(session_servers(session), session["model_id"], session["region"])
+    pooled.agent.messages = session["messages"]
+
+    # A concurrent request may have rehydrated the same session meanwhile
+    if session_id in session_agents:
+        discard_pooled_agent(pooled)
+        return session_agents[session_id]["agent"]
+
+    session_agents[session_id] = {
+        "agent": pooled.agent,
+        "server_urls": pooled.server_urls,
+        "version": session["version"],
+        "last_used": time.time()
+    }
+    return pooled.agent
+
+# Function to check whether a request asked to skip the response cache
+def cache_bypass_requested(request: Request):
+    bypass = request.headers.get("x-cache-bypass", "").lower() in ("1", "true", "yes")
+    return bypass or "no-cache" in request.headers.get("cache-control", "").lower()
+
+# Function to mark a session as having a turn in progress
+@contextmanager
+def track_turn(session_id):
+    active_turns[session_id] += 1
+    try:
+        yield
+    finally:
+        active_turns[session_id] -= 1
+        if not active_turns[session_id]:
+            del active_turns[session_id]
+
+# Function to run one agent turn, timed and counted by outcome
+async def invoke_turn(agent, query, cancellation=None):
+    """Run the turn until it finishes or cancellation fires; raises TurnCancelledError then"""
+    cancellation = cancellation or TurnCancellation()
+    messages = list(agent.messages)
+    try:
+        async with cancellation:
+            if cancellation.cancelled:
+                raise cancellation.abandon(agent, messages)
+            with span("turn"):
+                response = await agent.invoke_async(query, cancel_signal=cancellation.signal)
+    except TurnCancelledError:
+        raise
+    except Exception:
+        TURNS.labels("error").inc()
+        raise
+    if response.stop_reason == "cancelled":
+        raise cancellation.abandon(agent, messages)
+    TURNS.labels("ok").inc()
+    return response
+
+# Function to run one turn, answering from the response cache when possible
+async def run_session_turn(session_id, session, session_agent, query, user_id, bypass_cache=False, request=None):
+    """Return the response text and the cache headers describing how it was produced.
+
+    The turn is cancelled when request's client disconnects or the turn deadline passes.
+    """
+    with track_turn(session_id):
+        started = time.perf_counter()
+        if not response_cache.enabled:
+            async with limiter.slot(user_id):
+                response = await invoke_turn(session_agent, query, TurnCancellation(request))
+            save_exchange(
+                session_id, session, session_agent, query, str(response), None,
+                turn_usage(session_agent), (time.perf_counter() - started) * 1000
+            )
+            return str(response), {"X-Cache": "OFF"}
+
+        lookup = response_cache.prepare(
+            " ".join(session_servers(session)), session["model_id"], session_agent.tool_registry.get_all_tool_specs(), query
+        )
+        # The cache key has no conversation, so a follow-up ("and the top 5?") is never looked up or stored
+        follow_up = bool(session_agent.messages)
+        if follow_up:
+            response_cache.record_skip()
+            status = "SKIP"
+        elif bypass_cache:
+            response_cache.record_bypass()
+            status = "BYPASS"
+        else:
+            await response_cache.find(lookup)
+            status = "HIT" if lookup.response is not None else "MISS"
+
+        headers = {"X-Cache": status}
+        if lookup.response is not None:
+            # Record the turn so follow-up questions still see it in the conversation
+            response_text = lookup.response
+            session_agent.messages.append({"role": "user", "content": [{"text": query}]})
+            session_agent.messages.append({"role": "assistant", "content": [{"text": response_text}]})
+            headers["X-Cache-Tier"] = lookup.tier
+            TURNS.labels("cached").inc()
+            usage = (0, 0)
+        else:
+            async with limiter.slot(user_id):
+                response = await invoke_turn(session_agent, query, TurnCancellation(request))
+            response_text = str(response)
+            if not follow_up:
+                response_cache.store(lookup, response_text)
+            usage = turn_usage(session_agent)
+
+        save_exchange(
+            session_id, session, session_agent, query, response_text, None,
+            usage, (time.perf_counter() - started) * 1000
+        )
+        headers["X-Cache-Hit-Rate"] = str(response_cache.hit_rate())
+        return response_text, headers
+
+# Function to persist a completed turn
+def save_exchange(session_id, session, session_agent, query, response_text, html=None, usage=(0, 0), elapsed_ms=0.0):
+    """Record the exchange, rendered once to HTML, and the agent's messages in the session store"""
+    if html is None:
+        html = format_response(response_text)
+    load_history(session).append(
+        ChatExchange(query, response_text, html, usage[0], usage[1], round(elapsed_ms, 1))
+    )
+    session["messages"] = session_agent.messages
+    session["version"] += 1
+    session["last_active"] = time.time()
+    session_store.put(session_id, session)
+
+    cached = session_agents.get(session_id)
+    if cached:
+        cached["version"] = session["version"]
+
+# Function to render stored exchanges as HTML fragments
+def render_exchanges(chat_history, start, end):
+    """Render chat_history[start:end] with exchange.html, reusing each exchange's cached HTML"""
+    template = templates.get_template("exchange.html")
+    return "".join(
+        template.render(
+            index=index,
+            query=exchange.query,
+            # Exchanges saved before HTML was cached are rendered on the fly
+            html=exchange.html or format_response(exchange.response)
+        )
+        for index, exchange in enumerate(chat_history[start:end], start)
+    )
+
+# Function to drop this worker's agent for a session
+def discard_session_agent(session_id):
+    """Forget the local agent and release its pooled MCP connections"""
+    cached = session_agents.pop(session_id, None)
+    if cached:
+        for server_url in cached["server_urls"]:
+            mcp_pool.release(server_url)
+
+session_sweeper = SessionSweeper(session_store, session_agents, discard_session_agent, in_flight=active_turns)
+
+# Function to run a batch of independent prompts
+async def stream_batch(items, parallelism, user_id):
+    """Yield batch results in completion order; every item runs on its own fresh agent"""
+    await ensure_agent_stack()
+    from strands import Agent
+    from strands.tools.executors import ConcurrentToolExecutor
+
+    loop = asyncio.get_event_loop()
+    # Tools per server, loaded once per batch over the pooled connection
+    server_tools = {}
+
+    async def load_tools(server_url):
+        await loop.run_in_executor(None, mcp_pool.acquire, server_url)
+        try:
+            tools = await loop.run_in_executor(None, mcp_pool.get_tools, server_url)
+            return tool_result_cache.wrap(server_url, tools)
+        except Exception:
+            mcp_pool.release(server_url)
+            raise
+
+    async def run_item(item):
+        server_url = item["server_url"]
+        if server_url not in server_tools:
+            server_tools[server_url] = asyncio.ensure_future(load_tools(server_url))
+        tools = await asyncio.shield(server_tools[server_url])
+
+        model = await loop.run_in_executor(None, model_pool.get, item["model_id"], item["region"])
+        agent = Agent(
+            model=model,
+            tools=tools,
+            callback_handler=None,
+            conversation_manager=create_conversation_manager(item["model_id"]),
+            tool_executor=ConcurrentToolExecutor(),
+            hooks=[ModelCallMetrics(item["model_id"])]
+        )
+        # Batches get their own admission lane so they do not starve the user's chats
+        async with limiter.slot(f"{user_id}:batch", limit=parallelism):
+            response = await invoke_turn(agent, item["query"])
+        return str(response)
+
+    try:
+        async for result in run_batch(items, run_item, parallelism):
+            yield result
+    finally:
+        for server_url, future in server_tools.items():
+            try:
+                await future
+            except Exception:
+                continue
+            mcp_pool.release(server_url)
+
+# Expire login records together with their cookies
+login_sweeper = SessionSweeper(
+    login_store, {}, lambda login_id: None,
+    idle_ttl=DEFAULT_MAX_AGE, max_age=DEFAULT_MAX_AGE, max_sessions=LOGIN_MAX_COUNT
+)
 
 # Pydantic models for request/response
 class ConnectRequest(BaseModel):
     server_url: str = DEFAULT_MCP_SERVER
+    # Attach the session to several servers at once; takes precedence over server_url
+    server_urls: Optional[List[str]] = None
     region: str = "us-west-2"
-    model_id: str = "anthropic.claude-3-5-sonnet-20240620-v2:0"
+    model_id: str = "anthropic.claude-3-5-sonnet-20240620-v1:0"
 
 class QueryRequest(BaseModel):
     session_id: str
     query: str
 
+class BatchItem(BaseModel):
+    query: str
+    id: Optional[str] = None
+    server_url: Optional[str] = None
+    region: Optional[str] = None
+    model_id: Optional[str] = None
+
+class BatchQueryRequest(BaseModel):
+    items: List[BatchItem]
+    # Defaults for items that do not name their own server, region or model
+    server_url: str = DEFAULT_MCP_SERVER
+    region: str = "us-west-2"
+    model_id: str = "anthropic.claude-3-5-sonnet-20240620-v1:0"
+    parallelism: int = BATCH_DEFAULT_PARALLELISM
+
 class ConnectResponse(BaseModel):
     session_id: str
     connected: bool
+    # Servers left out of the session, with the reason; their tools are unavailable
+    degraded_servers: Dict[str, str] = {}
 
 class QueryResponse(BaseModel):
     response: str
 
 # Helper function to get the current user
 async def get_current_user(request: Request):
-    session = request.session
-    if "user" not in session:
+    # API clients send a Cognito access or ID token with every request
+    token = bearer_token(request)
+    if token:
+        try:
+            claims = await token_verifier.verify(token)
+        except InvalidTokenError as e:
+            logger.warning(f"Rejected bearer token: {str(e)}")
+            return None
+        return {
+            "id": claims.get("sub"),
+            "email": claims.get("email"),
+            "name": claims.get("name", claims.get("email", claims.get("username"))),
+            "groups": claims.get("cognito:groups", []),
+            "access_token": token
+        }
+
+    # Browsers hold a reference to a login record kept server-side
+    login_id = request.session.get("login")
+    if not login_id:
         return None
-    return session["user"]
+    login = login_store.get(login_id)
+    return login["user"] if login else None
+
+# Dependency for JSON API routes
+async def require_api_user(request: Request):
+    user = await get_current_user(request)
+    if not user:
+        raise HTTPException(
+            status_code=401,
+            detail="Authentication required",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return user
 
 # Authentication routes
 @app.get("/auth/login")
@@ -191,50 +816,37 @@ async def auth_callback(request: Request, code: str = None, error: str = None, e
             {"request": request, "error": f"Authentication error: {error_description}"}
         )
     try:
-        # Exchange code for tokens
-        token_url = f"https://{COGNITO_DOMAIN}/oauth2/token"
-        payload = {
-            "grant_type": "authorization_code",
-            "client_id": COGNITO_CLIENT_ID,
-            "code": code,
-            "redirect_uri": COGNITO_REDIRECT_URI
-        }
-        
-        # Add client secret if available
-        headers = {"Content-Type": "application/x-www-form-urlencoded"}
-        if COGNITO_CLIENT_SECRET:
-            auth_header = base64.b64encode(f"{COGNITO_CLIENT_ID}:{COGNITO_CLIENT_SECRET}".encode()).decode()
-            headers["Authorization"] = f"Basic {auth_header}"
-        
-        response = requests.post(token_url, data=payload, headers=headers)
-        tokens = response.json()
-        
-        if "error" in tokens:
-            logger.error(f"Token error: {tokens['error']}")
+        # Exchange code for tokens over the shared async client
+        try:
+            tokens = await oauth_client.exchange_code(code)
+        except OAuthError as e:
+            logger.error(f"Token error: {str(e)}")
             return templates.TemplateResponse(
                 "error.html", 
-                {"request": request, "error": f"Authentication error: {tokens['error']}"}
+                {"request": request, "error": f"Authentication error: {str(e)}"}
             )
         
-        # Parse ID token to get user info
+        # Verify the ID token's signature, issuer, audience and expiry
         id_token = tokens["id_token"]
-        token_parts = id_token.split('.')
-        if len(token_parts) != 3:
-            raise ValueError("Invalid token format")
+        user_info = await token_verifier.verify(id_token, token_use="id")
         
-        # Decode the payload part (add padding if needed)
-        payload = token_parts[1]
-        payload += '=' * ((4 - len(payload) % 4) % 4)  # Add padding
-        user_info = json.loads(base64.b64decode(payload).decode('utf-8'))
-        
-        # Store user info in session
-        request.session["user"] = {
-            "id": user_info.get("sub"),
-            "email": user_info.get("email"),
-            "name": user_info.get("name", user_info.get("email")),
-            "access_token": tokens["access_token"],
-            "id_token": id_token
-        }
+        # Store user info server-side; the cookie only carries the login reference
+        login_id = secrets.token_urlsafe(32)
+        now = time.time()
+        login_store.put(login_id, {
+            "user": {
+                "id": user_info.get("sub"),
+                "email": user_info.get("email"),
+                "name": user_info.get("name", user_info.get("email")),
+                "groups": user_info.get("cognito:groups", []),
+                "access_token": tokens["access_token"],
+                "id_token": id_token,
+                "refresh_token": tokens.get("refresh_token")
+            },
+            "created_at": now,
+            "last_active": now
+        })
+        request.session["login"] = login_id
         
         # Redirect to home page
         return RedirectResponse("/", status_code=status.HTTP_302_FOUND)
@@ -249,6 +861,18 @@ async def auth_callback(request: Request, code: str = None, error: str = None, e
 @app.get("/auth/logout")
 async def logout(request: Request):
     """Log out the user"""
+    # Drop the server-side login and revoke its refresh token
+    login_id = request.session.get("login")
+    login = login_store.get(login_id) if login_id else None
+    if login:
+        login_store.delete(login_id)
+    refresh_token = login["user"].get("refresh_token") if login else None
+    if refresh_token:
+        try:
+            await oauth_client.revoke(refresh_token)
+        except Exception as e:
+            logger.warning(f"Token revocation error: {str(e)}")
+
     # Clear session
     request.session.clear()
     
@@ -288,16 +912,7 @@ async def web_connect_form(request: Request):
         return RedirectResponse("/auth/login")
     
     # Get available servers
-    servers = []
-    config_path = os.path.join(os.path.dirname(__file__), "mcp_servers.json")
-    if os.path.exists(config_path):
-        with open(config_path, 'r') as f:
-            config = json.load(f)
-            for name, server_info in config.get("mcpServers", {}).items():
-                servers.append({
-                    "name": name,
-                    "url": server_info["url"]
-                })
+    servers = [{"name": server["name"], "url": server["url"]} for server in server_registry.servers]
     
     # Add default server if no servers are configured
     if not servers:
@@ -307,12 +922,12 @@ async def web_connect_form(request: Request):
         })
     
     # Get available models and regions
-    models, regions = load_supported_models()
+    models, regions = catalog.models.choices, catalog.models.regions
     
     # If no models found, provide some defaults
     if not models:
         models = [
-            {"id": "anthropic.claude-3-5-sonnet-20240620-v2:0", "name": "Claude 3.5 Sonnet (us-west-2)", "region": "us-west-2"},
+            {"id": "anthropic.claude-3-5-sonnet-20240620-v1:0", "name": "Claude 3.5 Sonnet (us-west-2)", "region": "us-west-2"},
             {"id": "anthropic.claude-3-haiku-20240307-v1:0", "name": "Claude 3 Haiku (us-west-2)", "region": "us-west-2"}
         ]
     
@@ -334,66 +949,26 @@ async def web_connect_form(request: Request):
 @app.post("/web/connect", response_class=HTMLResponse)
 async def web_connect(
     request: Request,
-    server_url: str = Form(...),
+    server_url: List[str] = Form(...),
     region: str = Form(...),
     model_id: str = Form(...)
 ):
     """Process the connect form submission"""
-    global global_mcp_client, global_agent
-    
     # Check if user is authenticated
     user = await get_current_user(request)
     if not user:
         return RedirectResponse("/auth/login")
     
     try:
-        # Generate session ID
-        import uuid
-        session_id = str(uuid.uuid4())
-        
-        # Always reinitialize the MCP client with the selected server
-        logger.info(f"Initializing MCP client with server: {server_url}")
-        
-        # Close existing client if any
-        if global_mcp_client:
-            try:
-                global_mcp_client.__exit__(None, None, None)
-                global_mcp_client = None
-            except Exception as e:
-                logger.error(f"Error closing existing MCP client: {str(e)}")
-        
-        # Create new client
-        global_mcp_client = MCPClient(lambda: sse_client(server_url))
-        
-        # Enter the context manager
-        global_mcp_client.__enter__()
-        
-        # Get the tools from the MCP server
-        logger.info("Fetching available tools...")
-        tools = global_mcp_client.list_tools_sync()
-        
-        # Create an agent with these tools
-        logger.info("Creating agent with MCP tools")
-        global_agent = Agent(tools=tools)
-        
-        logger.info(f"Available tools: {global_agent.tool_names}")
-        
-        # Store session info
-        clients[session_id] = {
-            "server_url": server_url,
-            "region": region,
-            "model_id": model_id,
-            "chat_history": [],
-            "access_token": user.get("access_token"),
-            "agent": Agent(tools=tools)
-        }
+        session_id, degraded = await create_session(server_url, region, model_id, user)
         
         return templates.TemplateResponse(
             "chat.html", 
             {
                 "request": request, 
                 "session_id": session_id,
-                "server_url": server_url,
+                "server_url": ", ".join(server_url),
+                "degraded_servers": degraded,
                 "region": region,
                 "model_id": model_id,
                 "user": user
@@ -436,27 +1011,14 @@ async def web_add_server(
         if not server_name or not server_url:
             return {"success": False, "error": "Server name and URL are required"}
         
-        # Create a simple config file to store server information
-        config_path = os.path.join(os.path.dirname(__file__), "mcp_servers.json")
-        
-        # Load existing config or create new one
-        if os.path.exists(config_path):
-            with open(config_path, 'r') as f:
-                config = json.load(f)
-        else:
-            config = {"mcpServers": {}}
-        
-        # Add or update server
-        config["mcpServers"][server_name] = {
+        # Add or update server; the registry serializes writers across workers
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, server_registry.upsert, server_name, {
             "url": server_url,
             "command": command,
             "transport": transport,
             "allow_http": allow_http
-        }
-        
-        # Save config
-        with open(config_path, 'w') as f:
-            json.dump(config, f, indent=2)
+        })
         
         return {"success": True, "message": f"Server '{server_name}' added successfully"}
     except Exception as e:
@@ -470,56 +1032,65 @@ async def web_query(
     query: str = Form(...)
 ):
     """Process a query from the web UI"""
-    #global global_agent, executor
-    
     # Check if user is authenticated
     user = await get_current_user(request)
     if not user:
         return RedirectResponse("/auth/login")
     
     try:
-        # Get client info
-        client_info = clients.get(session_id)
-        if not client_info:
+        # Get session info
+        session = session_store.get(session_id)
+        if not session:
             return templates.TemplateResponse(
                 "error.html", 
                 {"request": request, "error": "Session not found or expired"}
             )
         
-        server_url = client_info["server_url"]
-        region = client_info.get("region", "us-west-2")
-        model_id = client_info.get("model_id", "anthropic.claude-3-5-sonnet-20240620-v2:0")
-        chat_history = client_info.get("chat_history", [])
+        server_url = ", ".join(session_servers(session))
+        region = session.get("region", "us-west-2")
+        model_id = session.get("model_id", "anthropic.claude-3-5-sonnet-20240620-v1:0")
         
-        # Use session's agent instead of global agent
-        session_agent = client_info.get("agent")
-        if not session_agent:
-            return templates.TemplateResponse(
-                "error.html", 
-                {"request": request, "error": "Agent not initialized for this session"}
-            )
+        # Use session's agent, rebuilding it on this worker if necessary
+        session_agent = await get_session_agent(session_id, session)
 
-        # Process query using the session's agent
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(executor, session_agent, query)
-        
-        # Add this exchange to chat history
-        chat_history.append({"query": query, "response": response})
-        client_info["chat_history"] = chat_history  # Update the stored history
+        # Process query using the session's agent (or the response cache) and record the exchange
+        response, cache_headers = await run_session_turn(
+            session_id, session, session_agent, query, user["id"], cache_bypass_requested(request), request
+        )
         
+        # Only the latest page of history; earlier exchanges load on demand
+        chat_history = load_history(session)
+        history_start = max(0, len(chat_history) - HISTORY_PAGE_SIZE)
+
+        with span("render"):
+            history_html = render_exchanges(chat_history, history_start, len(chat_history))
+            return templates.TemplateResponse(
+                "response.html",
+                {
+                    "request": request,
+                    "session_id": session_id,
+                    "history_html": history_html,
+                    "history_start": history_start,
+                    "server_url": server_url,
+                    "region": region,
+                    "model_id": model_id,
+                    "user": user
+                },
+                headers=cache_headers
+            )
+    except QueueFullError as e:
+        TURNS.labels("rejected").inc()
         return templates.TemplateResponse(
-            "response.html", 
-            {
-                "request": request, 
-                "session_id": session_id,
-                "query": query,
-                "response": response,
-                "server_url": server_url,
-                "region": region,
-                "model_id": model_id,
-                "chat_history": chat_history[:-1],  # All but current exchange
-                "user": user
-            }
+            "error.html", 
+            {"request": request, "error": str(e)},
+            status_code=429,
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    except TurnCancelledError as e:
+        return templates.TemplateResponse(
+            "error.html", 
+            {"request": request, "error": str(e)},
+            status_code=e.status_code
         )
     except Exception as e:
         logger.error(f"Query error: {str(e)}", exc_info=True)
@@ -528,112 +1099,260 @@ async def web_query(
             {"request": request, "error": f"Query error: {str(e)}"}
         )
 
-# API routes
-@app.post("/connect", response_model=ConnectResponse)
-async def connect(request: ConnectRequest, req: Request):
-    global global_mcp_client, global_agent
-    
+@app.post("/web/exchange")
+async def web_exchange(
+    request: Request,
+    session_id: str = Form(...),
+    query: str = Form(...)
+):
+    """Process a query posted in the background by the web UI and return only the new exchange"""
     # Check if user is authenticated
-    user = await get_current_user(req)
+    user = await get_current_user(request)
     if not user:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    
+        return JSONResponse({"error": "Authentication required"}, status_code=401)
+
+    session = session_store.get(session_id)
+    if not session:
+        return JSONResponse({"error": "Session not found or expired"}, status_code=404)
+
     try:
-        # Generate session ID
-        import uuid
-        session_id = str(uuid.uuid4())
-        
-        # Always reinitialize the MCP client with the selected server
-        logger.info(f"Initializing MCP client with server: {request.server_url}")
-        
-        # Close existing client if any
-        if global_mcp_client:
-            try:
-                global_mcp_client.__exit__(None, None, None)
-                global_mcp_client = None
-            except Exception as e:
-                logger.error(f"Error closing existing MCP client: {str(e)}")
-        
-        # Create new client
-        global_mcp_client = MCPClient(lambda: sse_client(request.server_url))
-        
-        # Enter the context manager
-        global_mcp_client.__enter__()
-        
-        # Get the tools from the MCP server
-        logger.info("Fetching available tools...")
-        tools = global_mcp_client.list_tools_sync()
-        
-        # Create an agent with these tools
-        logger.info("Creating agent with MCP tools")
-        global_agent = Agent(tools=tools)
-        
-        logger.info(f"Available tools: {global_agent.tool_names}")
-        
-        # Store session info with dedicated agent
-        clients[session_id] = {
-            "server_url": request.server_url,
-            "region": request.region,
-            "model_id": request.model_id,
-            "chat_history": [],
-            "access_token": user.get("access_token"),
-            "agent": Agent(tools=tools)  # Store dedicated agent for this session
-        }
+        session_agent = await get_session_agent(session_id, session)
+        response, cache_headers = await run_session_turn(
+            session_id, session, session_agent, query, user["id"], cache_bypass_requested(request), request
+        )
+    except QueueFullError as e:
+        TURNS.labels("rejected").inc()
+        return JSONResponse({"error": str(e)}, status_code=429, headers={"Retry-After": str(e.retry_after)})
+    except TurnCancelledError as e:
+        return JSONResponse({"error": str(e)}, status_code=e.status_code)
+    except Exception as e:
+        logger.error(f"Query error: {str(e)}", exc_info=True)
+        return JSONResponse({"error": f"Query error: {str(e)}"}, status_code=500)
 
+    chat_history = load_history(session)
+    index = len(chat_history) - 1
+    with span("render"):
+        html = render_exchanges(chat_history, index, index + 1)
+    return JSONResponse({"index": index, "html": html}, headers=cache_headers)
+
+@app.get("/web/history")
+async def web_history(request: Request, session_id: str, before: int, limit: int = HISTORY_PAGE_SIZE):
+    """Return the page of exchanges preceding index before as HTML fragments"""
+    # Check if user is authenticated
+    user = await get_current_user(request)
+    if not user:
+        return JSONResponse({"error": "Authentication required"}, status_code=401)
+
+    session = session_store.get(session_id)
+    if not session:
+        return JSONResponse({"error": "Session not found or expired"}, status_code=404)
+
+    chat_history = load_history(session)
+    end = max(0, min(before, len(chat_history)))
+    start = max(0, end - max(1, min(limit, HISTORY_PAGE_SIZE)))
+    with span("render"):
+        html = render_exchanges(chat_history, start, end)
+    return {"start": start, "html": html, "has_more": start > 0}
+
+# API routes
+@app.post("/connect", response_model=ConnectResponse)
+async def connect(request: ConnectRequest, user: dict = Depends(require_api_user)):
+    try:
+        session_id, degraded = await create_session(
+            request.server_urls or [request.server_url], request.region, request.model_id, user
+        )
         
-        return ConnectResponse(session_id=session_id, connected=True)
+        return ConnectResponse(session_id=session_id, connected=True, degraded_servers=degraded)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Connection error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Connection error: {str(e)}")
 
 @app.post("/query", response_model=QueryResponse)
-async def query(request: QueryRequest, req: Request):
-    global global_agent, executor
-    
-    # Check if user is authenticated
-    user = await get_current_user(req)
-    if not user:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    
+async def query(request: QueryRequest, req: Request, http_response: Response, user: dict = Depends(require_api_user)):
     try:
-        # Get client info
-        client_info = clients.get(request.session_id)
-        if not client_info:
+        # Get session info
+        session = session_store.get(request.session_id)
+        if not session:
             raise HTTPException(status_code=404, detail="Session not found")
 
-        chat_history = client_info.get("chat_history", [])
-
-        # Use session's agent instead of global agent
-        session_agent = client_info.get("agent")
-        if not session_agent:
-            raise HTTPException(status_code=500, detail="Agent not initialized for this session")
+        # Use session's agent, rebuilding it on this worker if necessary
+        session_agent = await get_session_agent(request.session_id, session)
 
-        # Process query using the session's agent
-        loop = asyncio.get_event_loop()
-        response = await loop.run_in_executor(executor, session_agent, request.query)
-                
-        # Add to chat history
-        chat_history.append({"query": request.query, "response": response})
-        client_info["chat_history"] = chat_history
+        # Process query using the session's agent (or the response cache) and record the exchange
+        response, cache_headers = await run_session_turn(
+            request.session_id, session, session_agent, request.query, user["id"], cache_bypass_requested(req), req
+        )
+        http_response.headers.update(cache_headers)
         
         return QueryResponse(response=response)
+    except HTTPException:
+        raise
+    except QueueFullError as e:
+        TURNS.labels("rejected").inc()
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except TurnCancelledError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
     except Exception as e:
         logger.error(f"Query error: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=f"Query error: {str(e)}")
 
-# Cleanup session
-@app.delete("/session/{session_id}")
-async def cleanup_session(session_id: str, background_tasks: BackgroundTasks, request: Request):
+@app.post("/query/stream")
+async def query_stream(request: QueryRequest, user: dict = Depends(require_api_user)):
+    """Stream agent text and tool events as Server-Sent Events"""
+    # Get session info
+    session = session_store.get(request.session_id)
+    if not session:
+        raise HTTPException(status_code=404, detail="Session not found")
+    session_agent = await get_session_agent(request.session_id, session)
+
+    # Reject before the response starts so overflow can still be a 429
+    try:
+        limiter.check(user["id"])
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+
+    async def event_stream():
+        async for message in stream_session_query(request.session_id, session, session_agent, request.query, user["id"]):
+            yield format_sse(message)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.post("/query/batch")
+async def query_batch(request: BatchQueryRequest, user: dict = Depends(require_api_user)):
+    """Run many prompts concurrently and stream NDJSON results in completion order"""
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"A batch may contain at most {BATCH_MAX_ITEMS} items")
+    parallelism = max(1, min(request.parallelism, BATCH_MAX_PARALLELISM))
+
+    items = [
+        {
+            "id": item.id,
+            "query": item.query,
+            "server_url": item.server_url or request.server_url,
+            "region": item.region or request.region,
+            "model_id": item.model_id or request.model_id
+        }
+        for item in request.items
+    ]
+
+    async def result_stream():
+        async for result in stream_batch(items, parallelism, user["id"]):
+            yield format_ndjson(result)
+
+    return StreamingResponse(
+        result_stream(),
+        media_type="application/x-ndjson",
+        # Identity encoding keeps GZip from holding back lines until its buffer fills
+        headers={"Cache-Control": "no-cache", "Content-Encoding": "identity", "X-Accel-Buffering": "no"}
+    )
+
+@app.websocket("/query/ws")
+async def query_websocket(websocket: WebSocket):
+    """Stream agent text and tool events over a WebSocket, one query per message"""
     # Check if user is authenticated
-    user = await get_current_user(request)
+    user = await get_current_user(websocket)
     if not user:
-        raise HTTPException(status_code=401, detail="Authentication required")
-    
-    if session_id in clients:
-        del clients[session_id]
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    try:
+        while True:
+            payload = await websocket.receive_json()
+
+            # Get session info
+            session_id = payload.get("session_id")
+            session = session_store.get(session_id) if session_id else None
+            if not session:
+                await websocket.send_json({"type": "error", "error": "Session not found or expired"})
+                continue
+            session_agent = await get_session_agent(session_id, session)
+
+            # Closing the stream when a send fails cancels the turn rather than leaving it running
+            stream = stream_session_query(session_id, session, session_agent, payload.get("query", ""), user["id"])
+            async with aclosing(stream):
+                async for message in stream:
+                    await websocket.send_json(message)
+    except WebSocketDisconnect:
+        logger.info("Streaming WebSocket disconnected")
+
+# Cleanup session
+@app.delete("/session/{session_id}")
+async def cleanup_session(session_id: str, background_tasks: BackgroundTasks, user: dict = Depends(require_api_user)):
+    discard_session_agent(session_id)
+    if session_store.delete(session_id):
         return {"message": "Session cleaned up"}
     raise HTTPException(status_code=404, detail="Session not found")
 
+# Cacheable JSON response honoring If-None-Match
+def catalog_response(request: Request, body: bytes, etag: str):
+    headers = {"ETag": etag, "Cache-Control": f"private, max-age={CATALOG_MAX_AGE}"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+# Supported models with their regions and max tokens
+@app.get("/models")
+async def list_models(request: Request, user: dict = Depends(require_api_user)):
+    models = catalog.models
+    return catalog_response(request, models.body, models.etag)
+
+# Configured MCP servers
+@app.get("/servers")
+async def list_servers(request: Request, user: dict = Depends(require_api_user)):
+    servers = server_registry.snapshot
+    return catalog_response(request, servers.body, servers.etag)
+
+# Cache, pool and admission counters for monitoring
+@app.get("/stats")
+def stats():
+    return {
+        "tool_cache": tool_cache.stats(),
+        "response_cache": response_cache.stats(),
+        "tool_results": tool_result_cache.stats(),
+        "tool_calls": tool_call_limiter.stats(),
+        "agent_pool": agent_pool.stats(),
+        "payloads": payload_store.stats(),
+        "mcp_pool": mcp_pool.stats(),
+        "limiter": limiter.stats(),
+        "sessions": session_sweeper.stats(),
+        "logins": login_sweeper.stats(),
+        "context": context_stats.stats(),
+        "models": model_pool.stats(),
+        "catalog": catalog.stats(),
+        "servers": server_registry.stats(),
+        "oauth": oauth_client.stats(),
+        "tokens": token_verifier.stats(),
+        "agent_stack": {"loaded": agent_stack_seconds is not None, "seconds": agent_stack_seconds}
+    }
+
+# Latency histograms, token counters and pool gauges in the Prometheus text format
+@app.get("/metrics")
+def prometheus_metrics():
+    body = render_metrics(io_executor, len(session_agents), mcp_pool.stats())
+    return Response(content=body, media_type=CONTENT_TYPE_LATEST)
+
+# Full text of a tool result that was truncated in a conversation and spilled to disk
+@app.get("/tool-payloads/{payload_id}")
+async def get_tool_payload(payload_id: str, user: dict = Depends(require_api_user)):
+    loop = asyncio.get_event_loop()
+    text = await loop.run_in_executor(None, payload_store.get, payload_id)
+    if text is None:
+        raise HTTPException(status_code=404, detail="Payload not found or expired")
+    return PlainTextResponse(text)
+
+# Explicitly drop cached tool lists (e.g. after redeploying an MCP server)
+@app.post("/tools/invalidate")
+async def invalidate_tools(server_url: Optional[str] = None, user: dict = Depends(require_api_user)):
+    tool_cache.invalidate(server_url)
+    return {"message": "Tool cache invalidated", "server_url": server_url}
+
 # Health check endpoint - simplified for ELB
 @app.get("/health")
 def health_check():
@@ -644,6 +1363,31 @@ def health_check():
 def root():
     return PlainTextResponse("OK", status_code=200)
 
+# Function to time the startup event and the agent stack import for --profile-startup
+async def profile_startup():
+    phases = StartupPhases()
+    with phases.phase("startup event"):
+        await startup_event()
+    with phases.phase("agent stack (total)"):
+        await ensure_agent_stack()
+    for name, seconds in agent_stack.result().items():
+        phases.add(f"  import {name}", seconds)
+    with phases.phase("shutdown event"):
+        await shutdown_event()
+    return phases
+
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=5001, timeout_keep_alive=300)
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Strands Agent API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5001)
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Report import and initialization times instead of serving")
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        print_report("api", asyncio.run(profile_startup()), cwd=os.path.dirname(os.path.abspath(__file__)))
+    else:
+        import uvicorn
+        uvicorn.run(app, host=args.host, port=args.port, timeout_keep_alive=300)
\ No newline at end of file
@@ -0,0 +1,35 @@
+# api_auth.py
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.middleware.sessions import SessionMiddleware
+from starlette.requests import HTTPConnection
+
+
+def parse_bearer(authorization: str) -> Optional[str]:
+    """Return the token from an Authorization header value, or None if it has no bearer token"""
+    scheme, _, token = authorization.partition(" ")
+    token = token.strip()
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token
+
+
+def bearer_token(connection: HTTPConnection) -> Optional[str]:
+    """Return the token from an "Authorization: Bearer" header, if present"""
+    return parse_bearer(connection.headers.get("authorization", ""))
+
+
+class BrowserSessionMiddleware(SessionMiddleware):
+    """Cookie sessions for browser requests only.
+
+    Requests that authenticate with a bearer token skip cookie decoding and
+    re-signing entirely; they have no request.session.
+    """
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            if parse_bearer(Headers(scope=scope).get("authorization", "")):
+                await self.app(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
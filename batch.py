@@ -0,0 +1,68 @@
+# batch.py
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List
+
+logger = logging.getLogger("strands-agent-api.batch")
+
+# Items of one batch run at once unless the request asks for another value
+DEFAULT_PARALLELISM = int(os.environ.get("BATCH_PARALLELISM", "8"))
+# Upper bound on the parallelism a request may ask for
+MAX_PARALLELISM = int(os.environ.get("BATCH_MAX_PARALLELISM", "32"))
+# Maximum number of items in one batch
+MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "1000"))
+# Seconds one item may run before it is reported as failed
+DEFAULT_ITEM_TIMEOUT = float(os.environ.get("BATCH_ITEM_TIMEOUT", "300"))
+
+
+async def run_batch(
+    items: List[Dict],
+    run_item: Callable[[Dict], Awaitable[str]],
+    parallelism: int = DEFAULT_PARALLELISM,
+    item_timeout: float = DEFAULT_ITEM_TIMEOUT,
+) -> AsyncIterator[Dict]:
+    """Run run_item for every item, at most parallelism at once, yielding results as they complete.
+
+    Each result carries the item's index and id, its status ("ok" or "error"), the
+    response or error, and how long it waited and ran in milliseconds. Closing the
+    iterator early cancels the items still running.
+    """
+    semaphore = asyncio.Semaphore(parallelism)
+    results: asyncio.Queue = asyncio.Queue()
+
+    async def run_one(index: int, item: Dict):
+        submitted = time.perf_counter()
+        async with semaphore:
+            started = time.perf_counter()
+            result = {"index": index, "id": item.get("id") or str(index)}
+            try:
+                result["response"] = await asyncio.wait_for(run_item(item), timeout=item_timeout)
+                result["status"] = "ok"
+            except asyncio.TimeoutError:
+                result["status"] = "error"
+                result["error"] = f"Timed out after {item_timeout}s"
+            except Exception as e:
+                logger.error(f"Batch item {result['id']} failed: {str(e)}")
+                result["status"] = "error"
+                result["error"] = str(e)
+            finished = time.perf_counter()
+            result["queue_ms"] = round((started - submitted) * 1000, 1)
+            result["elapsed_ms"] = round((finished - started) * 1000, 1)
+        await results.put(result)
+
+    tasks = [asyncio.create_task(run_one(index, item)) for index, item in enumerate(items)]
+    try:
+        for _ in tasks:
+            yield await results.get()
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def format_ndjson(result: Dict) -> str:
+    """Encode a batch result as one NDJSON line"""
+    return json.dumps(result, default=str) + "\n"
@@ -0,0 +1,35 @@
+# api_server.py
+import argparse
+import os
+import sys
+
+import uvicorn
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Benchmark requests act as this user instead of signing in through Cognito
+BENCH_USER = {"id": "bench", "email": "bench@example.com", "name": "Benchmark", "groups": [], "access_token": "bench"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run api.py for benchmarks with Cognito sign-in bypassed")
+    parser.add_argument("--port", type=int, default=5001)
+    args = parser.parse_args()
+
+    # api.py resolves templates relative to the working directory
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault("MODEL_FACTORY", "bench.mock_model:create_model")
+
+    import api
+
+    async def bench_user(request):
+        return BENCH_USER
+
+    # require_api_user and the web routes all resolve the user through this function
+    api.get_current_user = bench_user
+    uvicorn.run(api.app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
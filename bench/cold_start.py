@@ -0,0 +1,127 @@
+# cold_start.py
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+import httpx
+
+from bench.run import ROOT, free_port, git_commit, percentile
+from startup import import_breakdown
+
+
+def summarize(samples: List[float]) -> dict:
+    """Median and worst of samples given in seconds, in milliseconds"""
+    return {
+        "p50": round(percentile(samples, 0.50) * 1000, 1),
+        "max": round(max(samples) * 1000, 1),
+    }
+
+
+def cold_start(timeout: float) -> Dict[str, float]:
+    """Start the API in a fresh process; seconds until /health answers and until the agent stack is loaded"""
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=ROOT, MODEL_FACTORY="bench.mock_model:create_model")
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "bench.api_server", "--port", str(port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    result = {}
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1) as client:
+            while "agent_stack" not in result:
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError(f"API did not finish starting within {timeout}s")
+                try:
+                    if "health" not in result:
+                        if client.get("/health").status_code == 200:
+                            result["health"] = time.perf_counter() - started
+                    elif client.get("/stats").json()["agent_stack"]["loaded"]:
+                        result["agent_stack"] = time.perf_counter() - started
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.01)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    return result
+
+
+def cli_help() -> float:
+    """Seconds for agent_cli.py --help, which should not load the agent stack"""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "agent_cli.py", "--help"], cwd=ROOT, stdout=subprocess.DEVNULL, check=True)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start benchmark of api.py and agent_cli.py")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes per measurement")
+    parser.add_argument("--timeout", type=float, default=60, help="Seconds to wait for each API start")
+    parser.add_argument("--max-health-ms", type=float, default=None,
+                        help="Exit with status 1 if the median time to a /health answer exceeds this")
+    parser.add_argument("--output", help="Results file (default bench/results/cold-start-<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier startup results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="Exit with status 1 if any median grows by more than this percentage over the baseline")
+    args = parser.parse_args()
+
+    started_at = datetime.now(timezone.utc)
+    samples: Dict[str, List[float]] = {"import_api": [], "import_agent_cli": [], "health": [], "agent_stack": [], "cli_help": []}
+    for _ in range(args.runs):
+        samples["import_api"].append(import_breakdown("api", ROOT)[0])
+        samples["import_agent_cli"].append(import_breakdown("agent_cli", ROOT)[0])
+        for name, seconds in cold_start(args.timeout).items():
+            samples[name].append(seconds)
+        samples["cli_help"].append(cli_help())
+
+    report = {
+        "started_at": started_at.isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"runs": args.runs},
+        "startup_ms": {name: summarize(values) for name, values in samples.items()},
+    }
+
+    output = args.output or os.path.join(
+        ROOT, "bench", "results", "cold-start-" + started_at.strftime("%Y%m%dT%H%M%SZ") + ".json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as results_file:
+        json.dump(report, results_file, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+
+    failures = []
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["startup_ms"]
+    print(f"{'measurement':<18}{'p50 ms':>10}{'max ms':>10}{'baseline':>10}{'change':>10}")
+    for name, result in report["startup_ms"].items():
+        line = f"{name:<18}{result['p50']:>10.1f}{result['max']:>10.1f}"
+        previous = baseline.get(name)
+        if previous:
+            change = (result["p50"] - previous["p50"]) / previous["p50"] * 100 if previous["p50"] else 0.0
+            line += f"{previous['p50']:>10.1f}{change:>9.1f}%"
+            if args.max_regression is not None and change > args.max_regression:
+                failures.append(f"{name} p50 {previous['p50']:.1f}ms -> {result['p50']:.1f}ms ({change:+.1f}%)")
+        print(line)
+
+    health = report["startup_ms"]["health"]["p50"]
+    if args.max_health_ms is not None and health > args.max_health_ms:
+        failures.append(f"/health answered after {health:.1f}ms (limit {args.max_health_ms:.1f}ms)")
+    if failures:
+        for failure in failures:
+            print(f"Regression: {failure}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# mock_mcp_server.py
+import argparse
+import asyncio
+
+import uvicorn
+from mcp.types import ToolAnnotations
+
+try:
+    from mcp.server.fastmcp import FastMCP
+except ImportError:
+    # mcp 2.x renamed FastMCP to MCPServer
+    from mcp.server.mcpserver import MCPServer as FastMCP
+
+
+def create_app(latency: float, payload_bytes: int, read_only: bool):
+    """SSE MCP server whose tools sleep for latency seconds and return payload_bytes of text"""
+    server = FastMCP("bench")
+    annotations = ToolAnnotations(readOnlyHint=True) if read_only else None
+    payload = "x" * payload_bytes
+
+    @server.tool(annotations=annotations)
+    async def lookup(key: str) -> str:
+        """Look up a record by key"""
+        await asyncio.sleep(latency)
+        return f"{key}: {payload}"
+
+    @server.tool(annotations=annotations)
+    async def search(query: str, limit: int = 10) -> str:
+        """Search records matching a query"""
+        await asyncio.sleep(latency)
+        return f"{limit} results for {query}: {payload}"
+
+    return server.sse_app()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in MCP server for benchmarks")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds each tool call takes")
+    parser.add_argument("--payload-bytes", type=int, default=1024, help="Size of each tool result")
+    parser.add_argument("--read-only", action="store_true", help="Annotate tools with readOnlyHint")
+    args = parser.parse_args()
+
+    app = create_app(args.latency, args.payload_bytes, args.read_only)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# mock_model.py
+import asyncio
+import json
+import os
+import uuid
+
+from strands.models.model import Model
+
+# Tool calls the model requests on the first cycle of each turn
+DEFAULT_TOOL_CALLS = int(os.environ.get("BENCH_TOOL_CALLS", "1"))
+# Seconds before the first streamed chunk of every response
+DEFAULT_FIRST_TOKEN_LATENCY = float(os.environ.get("BENCH_FIRST_TOKEN_LATENCY", "0.2"))
+# Seconds between streamed output tokens
+DEFAULT_TOKEN_LATENCY = float(os.environ.get("BENCH_TOKEN_LATENCY", "0.005"))
+# Tokens in the final answer
+DEFAULT_OUTPUT_TOKENS = int(os.environ.get("BENCH_OUTPUT_TOKENS", "50"))
+
+
+# Values for required fields that are not strings (strings get the prompt)
+_PLACEHOLDERS = {"integer": 1, "number": 1, "boolean": False, "array": [], "object": {}}
+
+
+def _required_values(schema: dict, text: str) -> dict:
+    """Fill a JSON schema's required fields: strings get the prompt, other types a placeholder"""
+    properties = schema.get("properties", {})
+    return {
+        name: _PLACEHOLDERS.get(properties.get(name, {}).get("type"), text)
+        for name in schema.get("required", [])
+    }
+
+
+def _tool_input(tool_spec: dict, text: str) -> dict:
+    """Fill the tool's required arguments"""
+    return _required_values(tool_spec.get("inputSchema", {}).get("json", {}), text)
+
+
+def _prompt_text(message: dict) -> str:
+    return " ".join(block["text"] for block in message["content"] if "text" in block)
+
+
+class ScriptedModel(Model):
+    """Model provider that stands in for Bedrock in benchmarks.
+
+    The first response of a turn requests tool_calls tool uses (cycling through the
+    available tools); once tool results arrive it streams an output_tokens answer.
+    """
+
+    def __init__(
+        self,
+        model_id: str = "bench",
+        tool_calls: int = DEFAULT_TOOL_CALLS,
+        first_token_latency: float = DEFAULT_FIRST_TOKEN_LATENCY,
+        token_latency: float = DEFAULT_TOKEN_LATENCY,
+        output_tokens: int = DEFAULT_OUTPUT_TOKENS,
+    ):
+        self.config = {"model_id": model_id}
+        self.tool_calls = tool_calls
+        self.first_token_latency = first_token_latency
+        self.token_latency = token_latency
+        self.output_tokens = output_tokens
+
+    def update_config(self, **model_config):
+        self.config.update(model_config)
+
+    def get_config(self):
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        """Return output_model with its required fields filled from the last prompt"""
+        await asyncio.sleep(self.first_token_latency)
+        values = _required_values(output_model.model_json_schema(), _prompt_text(prompt[-1]) or "bench")
+        yield {"output": output_model.model_validate(values)}
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        await asyncio.sleep(self.first_token_latency)
+        yield {"messageStart": {"role": "assistant"}}
+
+        last = messages[-1]
+        prompt = _prompt_text(last)
+        awaiting_tools = not any("toolResult" in block for block in last["content"])
+        output_tokens = 0
+
+        if tool_specs and self.tool_calls and awaiting_tools:
+            for index in range(self.tool_calls):
+                tool_spec = tool_specs[index % len(tool_specs)]
+                yield {"contentBlockStart": {"start": {"toolUse": {
+                    "toolUseId": f"tooluse_{uuid.uuid4().hex}", "name": tool_spec["name"]
+                }}}}
+                yield {"contentBlockDelta": {"delta": {"toolUse": {
+                    "input": json.dumps(_tool_input(tool_spec, prompt or "bench"))
+                }}}}
+                yield {"contentBlockStop": {}}
+                output_tokens += 20
+            yield {"messageStop": {"stopReason": "tool_use"}}
+        else:
+            for index in range(self.output_tokens):
+                await asyncio.sleep(self.token_latency)
+                yield {"contentBlockDelta": {"delta": {"text": f"token{index} "}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+            output_tokens = self.output_tokens
+
+        input_tokens = len(json.dumps(messages, default=str)) // 4
+        yield {"metadata": {
+            "usage": {"inputTokens": input_tokens, "outputTokens": output_tokens, "totalTokens": input_tokens + output_tokens},
+            "metrics": {"latencyMs": 0},
+        }}
+
+
+def create_model(model_id: str, region: str):
+    """MODEL_FACTORY entry point: bench.mock_model:create_model"""
+    return ScriptedModel(model_id)
@@ -0,0 +1,330 @@
+# run.py
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ["query", "web_query", "stream"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of values"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> dict:
+    """Request count, error count, throughput and latency percentiles in milliseconds"""
+    return {
+        "requests": len(latencies) + errors,
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99": round(percentile(latencies, 0.99) * 1000, 1),
+            "mean": round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+            "max": round(max(latencies) * 1000, 1) if latencies else 0.0,
+        },
+    }
+
+
+def rss_kb(pid: int) -> Optional[int]:
+    """Resident set size of a process in KiB (Linux only)"""
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, text=True).strip()
+    except Exception:
+        return None
+
+
+class Processes:
+    """Starts the mock MCP server and the API under test, and stops them on exit"""
+
+    def __init__(self, args):
+        self.args = args
+        self.mcp_port = free_port()
+        self.api_port = free_port()
+        self.children: List[subprocess.Popen] = []
+
+    def __enter__(self):
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        # Server logs and the agents' printed output would drown the report
+        output = None if self.args.verbose else subprocess.DEVNULL
+        mcp_command = [
+            sys.executable, "-m", "bench.mock_mcp_server", "--port", str(self.mcp_port),
+            "--latency", str(self.args.tool_latency), "--payload-bytes", str(self.args.payload_bytes)
+        ]
+        if self.args.read_only:
+            mcp_command.append("--read-only")
+        self.children.append(subprocess.Popen(mcp_command, cwd=ROOT, env=env, stdout=output, stderr=output))
+
+        env.update({
+            "MODEL_FACTORY": "bench.mock_model:create_model",
+            "BENCH_TOOL_CALLS": str(self.args.tool_calls),
+            "BENCH_FIRST_TOKEN_LATENCY": str(self.args.first_token_latency),
+            "BENCH_TOKEN_LATENCY": str(self.args.token_latency),
+            "BENCH_OUTPUT_TOKENS": str(self.args.output_tokens),
+            # Admission limits must not be what the benchmark measures
+            "AGENT_MAX_PER_USER": str(max(self.args.concurrency, 1) * 2),
+            "AGENT_MAX_CONCURRENT": str(max(self.args.concurrency, 1) * 2),
+            "MCP_POOL_PREWARM": "false",
+        })
+        self.children.append(subprocess.Popen(
+            [sys.executable, "-m", "bench.api_server", "--port", str(self.api_port)],
+            cwd=ROOT, env=env, stdout=output, stderr=output
+        ))
+        return self
+
+    def __exit__(self, *exc):
+        for child in self.children:
+            child.terminate()
+        for child in self.children:
+            try:
+                child.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                child.kill()
+
+    @property
+    def api_pid(self) -> int:
+        return self.children[1].pid
+
+    @property
+    def api_url(self) -> str:
+        return f"http://127.0.0.1:{self.api_port}"
+
+    @property
+    def mcp_url(self) -> str:
+        return f"http://127.0.0.1:{self.mcp_port}/sse"
+
+    async def wait_ready(self, timeout: float = 60):
+        deadline = time.monotonic() + timeout
+        async with httpx.AsyncClient() as client:
+            for url in (self.mcp_url.rsplit("/", 1)[0] + "/", self.api_url + "/health"):
+                while True:
+                    try:
+                        await client.get(url, timeout=1)
+                        break
+                    except httpx.TransportError:
+                        if time.monotonic() > deadline:
+                            raise RuntimeError(f"{url} did not come up within {timeout}s")
+                        await asyncio.sleep(0.2)
+
+
+async def drive(
+    request: Callable[[int], Awaitable[None]], total: int, concurrency: int
+) -> Dict:
+    """Run request(i) total times with at most concurrency in flight and summarize the latencies"""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for index in counter:
+            started = time.perf_counter()
+            try:
+                await request(index)
+                latencies.append(time.perf_counter() - started)
+            except Exception as e:
+                errors += 1
+                if errors <= 3:
+                    print(f"  request {index} failed: {e}", file=sys.stderr)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+async def benchmark(args, processes: Processes) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency * 2, max_keepalive_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=processes.api_url, timeout=args.timeout, limits=limits) as client:
+        async def connect(index: int):
+            response = await client.post("/connect", json={"server_url": processes.mcp_url, "model_id": "bench"})
+            response.raise_for_status()
+            session_ids.append(response.json()["session_id"])
+
+        # The first connect opens the pooled MCP connection; later ones measure per-session cost
+        session_ids: List[str] = []
+        await connect(0)
+        rss_before = rss_kb(processes.api_pid)
+        connect_results = await drive(connect, args.sessions, args.concurrency)
+        rss_after = rss_kb(processes.api_pid)
+        if rss_before is not None and rss_after is not None:
+            connect_results["rss_before_mb"] = round(rss_before / 1024, 1)
+            connect_results["rss_after_mb"] = round(rss_after / 1024, 1)
+            connect_results["memory_per_session_kb"] = round((rss_after - rss_before) / max(args.sessions, 1), 1)
+
+        # An agent runs one turn at a time, so each request checks a session out
+        idle_sessions: asyncio.Queue = asyncio.Queue()
+        for session_id in session_ids:
+            idle_sessions.put_nowait(session_id)
+
+        @asynccontextmanager
+        async def session_for(index: int):
+            session_id = await idle_sessions.get()
+            try:
+                yield session_id
+            finally:
+                idle_sessions.put_nowait(session_id)
+
+        async def query(index: int):
+            async with session_for(index) as session_id:
+                response = await client.post("/query", json={"session_id": session_id, "query": f"question {index}"})
+            response.raise_for_status()
+
+        async def web_query(index: int):
+            async with session_for(index) as session_id:
+                response = await client.post("/web/query", data={"session_id": session_id, "query": f"question {index}"})
+            response.raise_for_status()
+            # The web UI reports failures with the error page and a 200 status
+            if "<title>Error" in response.text:
+                raise RuntimeError("error page returned")
+
+        first_event: List[float] = []
+
+        async def stream(index: int):
+            started = time.perf_counter()
+            seen_first = False
+            async with session_for(index) as session_id:
+                payload = {"session_id": session_id, "query": f"question {index}"}
+                async with client.stream("POST", "/query/stream", json=payload) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if line.startswith("event: text") and not seen_first:
+                            first_event.append(time.perf_counter() - started)
+                            seen_first = True
+                        elif line.startswith("event: error"):
+                            raise RuntimeError("stream reported an error")
+
+        requests = {"query": query, "web_query": web_query, "stream": stream}
+        results = {"connect": connect_results, "scenarios": {}}
+        for name in args.scenarios:
+            print(f"Running {name}: {args.requests} requests at concurrency {args.concurrency}", file=sys.stderr)
+            results["scenarios"][name] = await drive(requests[name], args.requests, args.concurrency)
+        if "stream" in results["scenarios"]:
+            results["scenarios"]["stream"]["first_text_ms"] = summarize(first_event, 0, 0)["latency_ms"]
+
+        results["server_stats"] = (await client.get("/stats")).json()
+        return results
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """Print p50/p95/p99 and throughput changes against a baseline; return the p95 regressions"""
+    regressions = []
+    rows = [("connect", current["connect"], baseline.get("connect"))]
+    rows += [(name, result, baseline.get("scenarios", {}).get(name)) for name, result in current["scenarios"].items()]
+    print(f"{'scenario':<12}{'metric':>8}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, result, previous in rows:
+        if not previous:
+            continue
+        for metric in ("p50", "p95", "p99"):
+            old, new = previous["latency_ms"][metric], result["latency_ms"][metric]
+            change = (new - old) / old * 100 if old else 0.0
+            print(f"{name:<12}{metric:>8}{old:>12.1f}{new:>12.1f}{change:>9.1f}%")
+            if metric == "p95" and change > threshold:
+                regressions.append(f"{name} p95 {old:.1f}ms -> {new:.1f}ms ({change:+.1f}%)")
+        old, new = previous["rps"], result["rps"]
+        change = (new - old) / old * 100 if old else 0.0
+        print(f"{name:<12}{'rps':>8}{old:>12.1f}{new:>12.1f}{change:>9.1f}%")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test of api.py against a mock MCP server and model")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--sessions", type=int, default=32,
+                        help="Sessions to create with /connect (at least --concurrency)")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--tool-latency", type=float, default=0.05, help="Seconds per mock MCP tool call")
+    parser.add_argument("--payload-bytes", type=int, default=1024, help="Size of each mock tool result")
+    parser.add_argument("--read-only", action="store_true", help="Mark mock tools read-only so results are cached")
+    parser.add_argument("--tool-calls", type=int, default=1, help="Tool calls the mock model makes per turn")
+    parser.add_argument("--first-token-latency", type=float, default=0.2, help="Seconds before each model response")
+    parser.add_argument("--token-latency", type=float, default=0.005, help="Seconds per streamed output token")
+    parser.add_argument("--output-tokens", type=int, default=50, help="Tokens in each final answer")
+    parser.add_argument("--timeout", type=float, default=120, help="Per-request timeout in seconds")
+    parser.add_argument("--verbose", action="store_true", help="Show the servers' logs")
+    parser.add_argument("--output", help="Results file (default bench/results/<timestamp>.json)")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=None,
+                        help="Exit with status 1 if any p95 grows by more than this percentage over the baseline")
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    # Every request in flight needs its own idle session
+    args.sessions = max(args.sessions, args.concurrency)
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    started_at = datetime.now(timezone.utc)
+    with Processes(args) as processes:
+        asyncio.run(processes.wait_ready())
+        results = asyncio.run(benchmark(args, processes))
+
+    config = {key: value for key, value in vars(args).items() if key not in ("output", "baseline", "max_regression", "verbose")}
+    report = {
+        "started_at": started_at.isoformat(),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        **results,
+    }
+
+    output = args.output or os.path.join(ROOT, "bench", "results", started_at.strftime("%Y%m%dT%H%M%SZ") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as results_file:
+        json.dump(report, results_file, indent=2)
+    print(f"Results written to {output}", file=sys.stderr)
+
+    summary = {"connect": report["connect"], **report["scenarios"]}
+    for name, result in summary.items():
+        latency = result["latency_ms"]
+        print(f"{name:<12}{result['rps']:>8.1f} rps  p50 {latency['p50']:.1f}ms  p95 {latency['p95']:.1f}ms  "
+              f"p99 {latency['p99']:.1f}ms  errors {result['errors']}")
+    if "memory_per_session_kb" in report["connect"]:
+        print(f"memory per session: {report['connect']['memory_per_session_kb']} KiB")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.max_regression or float("inf"))
+        if args.max_regression is not None and regressions:
+            for regression in regressions:
+                print(f"Regression: {regression}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
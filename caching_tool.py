@@ -0,0 +1,126 @@
+# caching_tool.py
+import asyncio
+import copy
+import json
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from strands.types._events import ToolResultEvent
+from strands.types.tools import AgentTool
+
+from metrics import record_tool_call
+
+from tool_result_cache import ToolCallCancelled
+
+if TYPE_CHECKING:
+    from tool_result_cache import ToolResultCache
+
+
+class CachingTool(AgentTool):
+    """AgentTool wrapper that serves read-only MCP tool results from a ToolResultCache.
+
+    When name is given the agent sees the tool under that name; the MCP server,
+    the cache and the statistics keep using the server's own tool name. Calls that
+    reach the server wait for a slot in the cache's ToolCallLimiter and are cut off
+    after the server's timeout, which the model sees as an error result. Calls
+    made for a cancelled agent turn are skipped or, once sent, cancelled by the
+    MCP client, and their results are never shared with coalesced callers.
+    """
+
+    def __init__(
+        self, tool: AgentTool, server_url: str, cache: "ToolResultCache", cacheable: bool, name: Optional[str] = None
+    ):
+        super().__init__()
+        self.tool = tool
+        self.server_url = server_url
+        self.cache = cache
+        self.cacheable = cacheable
+        self.name = name
+
+    @property
+    def tool_name(self) -> str:
+        return self.name or self.tool.tool_name
+
+    @property
+    def tool_spec(self):
+        if self.name is None:
+            return self.tool.tool_spec
+        return dict(self.tool.tool_spec, name=self.name)
+
+    @property
+    def tool_type(self) -> str:
+        return self.tool.tool_type
+
+    async def stream(self, tool_use, invocation_state: Dict[str, Any], **kwargs):
+        started = time.perf_counter()
+        server_tool_name = self.tool.tool_name
+        stats = self.cache.stats_for(self.server_url, server_tool_name)
+        stats.calls += 1
+        outcome = "uncached"
+        try:
+            if not self.cacheable:
+                result = await self._call(tool_use, invocation_state, **kwargs)
+                yield ToolResultEvent(result)
+                return
+
+            key = (self.server_url, server_tool_name, json.dumps(tool_use.get("input"), sort_keys=True, default=str))
+            result = self.cache.get(key)
+            if result is not None:
+                stats.hits += 1
+                outcome = "hit"
+            else:
+                result, coalesced = await self.cache.call_once(key, self._call, tool_use, invocation_state, **kwargs)
+                if coalesced:
+                    stats.coalesced += 1
+                outcome = "coalesced" if coalesced else "miss"
+            # Results are shared between calls, so each caller gets its own copy with its own ID
+            result = copy.deepcopy(result)
+            result["toolUseId"] = tool_use["toolUseId"]
+            yield ToolResultEvent(result)
+        except ToolCallCancelled:
+            stats.cancelled += 1
+            outcome = "cancelled"
+            yield ToolResultEvent({
+                "toolUseId": tool_use["toolUseId"],
+                "status": "error",
+                "content": [{"text": f"Tool {server_tool_name} was cancelled"}],
+                "cancelled": True,
+            })
+        except asyncio.TimeoutError:
+            stats.errors += 1
+            outcome = "timeout"
+            yield ToolResultEvent({
+                "toolUseId": tool_use["toolUseId"],
+                "status": "error",
+                "content": [{"text": f"Tool {server_tool_name} timed out; the server did not answer in time"}],
+            })
+        except Exception:
+            stats.errors += 1
+            outcome = "error"
+            raise
+        finally:
+            stats.observe((time.perf_counter() - started) * 1000)
+            record_tool_call(self.server_url, server_tool_name, outcome, started)
+
+    async def _call(self, tool_use, invocation_state: Dict[str, Any], **kwargs) -> dict:
+        agent = invocation_state.get("agent")
+        async with self.cache.limiter.slot(self.server_url) as timeout:
+            # The turn may have been cancelled while the call waited for a slot
+            if agent is not None and agent.cancel_signal.is_set():
+                raise ToolCallCancelled()
+            try:
+                result = await asyncio.wait_for(self._collect(tool_use, invocation_state, **kwargs), timeout)
+            except asyncio.TimeoutError:
+                self.cache.limiter.timed_out(self.server_url, self.tool.tool_name, timeout)
+                raise
+        # The MCP client saw the agent's cancel signal and abandoned the request
+        if result is not None and result.get("cancelled"):
+            raise ToolCallCancelled()
+        return result
+
+    async def _collect(self, tool_use, invocation_state: Dict[str, Any], **kwargs) -> dict:
+        result = None
+        async for event in self.tool.stream(tool_use, invocation_state, **kwargs):
+            if isinstance(event, ToolResultEvent):
+                result = event.tool_result
+        return result
@@ -0,0 +1,103 @@
+# cancellation.py
+import asyncio
+import logging
+import os
+import threading
+from typing import Optional
+
+from metrics import CANCELLED_TURNS, TURNS
+
+logger = logging.getLogger("strands-agent-api.cancellation")
+
+# Seconds an agent turn may run before it is cancelled; 0 disables the deadline
+DEFAULT_TURN_TIMEOUT = float(os.environ.get("AGENT_TURN_TIMEOUT", "300"))
+# Seconds between checks for a client that went away while its turn runs
+DEFAULT_DISCONNECT_POLL_INTERVAL = float(os.environ.get("AGENT_DISCONNECT_POLL_INTERVAL", "0.5"))
+
+
+class TurnCancelledError(Exception):
+    """Raised when an agent turn was stopped early; reason is "deadline" or "disconnect"."""
+
+    def __init__(self, reason: str, timeout: float):
+        if reason == "deadline":
+            message = f"The agent did not finish within {timeout:g}s"
+        else:
+            message = "The client disconnected before the agent finished"
+        super().__init__(message)
+        self.reason = reason
+
+    @property
+    def status_code(self) -> int:
+        # 499 is the de facto "client closed request" status; nobody reads it anyway
+        return 504 if self.reason == "deadline" else 499
+
+
+class TurnCancellation:
+    """Cancel signal for one agent turn, set by its deadline or by its client going away.
+
+    signal is passed to the agent as its cancel_signal: the agent stops at its next
+    model or tool boundary, and in-flight MCP requests see the signal and are
+    cancelled too. The deadline and, when request is given, the disconnect watcher
+    run while the instance is entered with async with.
+    """
+
+    def __init__(
+        self,
+        request=None,
+        timeout: float = DEFAULT_TURN_TIMEOUT,
+        poll_interval: float = DEFAULT_DISCONNECT_POLL_INTERVAL,
+    ):
+        self.request = request
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        # Read from the agent's threads and MCP client threads
+        self.signal = threading.Event()
+        self.reason: Optional[str] = None
+        self._deadline: Optional[asyncio.TimerHandle] = None
+        self._watcher: Optional[asyncio.Task] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.signal.is_set()
+
+    def cancel(self, reason: str):
+        """Cancel the turn; the first reason given is the one reported"""
+        if not self.signal.is_set():
+            self.reason = reason
+            self.signal.set()
+
+    async def __aenter__(self) -> "TurnCancellation":
+        if self.timeout > 0:
+            self._deadline = asyncio.get_running_loop().call_later(self.timeout, self.cancel, "deadline")
+        if self.request is not None:
+            # The client may have left while the turn waited for admission
+            if await self.request.is_disconnected():
+                self.cancel("disconnect")
+            else:
+                self._watcher = asyncio.ensure_future(self._watch_disconnect())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self._deadline is not None:
+            self._deadline.cancel()
+        if self._watcher is not None:
+            self._watcher.cancel()
+
+    async def _watch_disconnect(self):
+        while not self.signal.is_set():
+            await asyncio.sleep(self.poll_interval)
+            if await self.request.is_disconnected():
+                self.cancel("disconnect")
+
+    def abandon(self, agent, messages: list) -> TurnCancelledError:
+        """Count the cancelled turn and put the agent's conversation back as it was before it.
+
+        The partial turn (the query, a cut-off answer, unanswered tool uses) is
+        dropped so the agent matches the stored session, which never saw it.
+        """
+        reason = self.reason or "deadline"
+        agent.messages = messages
+        TURNS.labels("cancelled").inc()
+        CANCELLED_TURNS.labels(reason).inc()
+        logger.info(f"Agent turn cancelled ({reason})")
+        return TurnCancelledError(reason, self.timeout)
@@ -0,0 +1,137 @@
+# catalog.py
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("strands-agent-api.catalog")
+
+# Seconds between checks of the catalog files' modification times
+DEFAULT_CHECK_INTERVAL = float(os.environ.get("CATALOG_CHECK_INTERVAL", "2"))
+# Seconds clients may cache GET /models and GET /servers before revalidating
+CATALOG_MAX_AGE = int(os.environ.get("CATALOG_MAX_AGE", "60"))
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _serialize(payload) -> Tuple[bytes, str]:
+    """JSON body and its strong ETag"""
+    body = json.dumps(payload, separators=(",", ":")).encode()
+    return body, f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def parse_models(text: str) -> List[dict]:
+    """Parse model_tooluse.txt lines: name | tool use | model ID | region | max tokens"""
+    models = []
+    for line in text.strip().split('\n'):
+        parts = line.split('|')
+        if len(parts) < 5:
+            continue
+        try:
+            max_tokens = int(parts[4].strip())
+        except ValueError:
+            max_tokens = None
+        models.append({
+            "id": parts[2].strip(),
+            "name": parts[0].strip(),
+            "region": parts[3].strip(),
+            "tool_use": parts[1].strip().lower() == "yes",
+            "max_tokens": max_tokens,
+        })
+    return models
+
+
+class ModelCatalog:
+    """Immutable index of the models in model_tooluse.txt"""
+
+    def __init__(self, models: List[dict]):
+        self.models = models
+        self.by_id: Dict[str, List[dict]] = {}
+        self.by_name: Dict[str, List[dict]] = {}
+        self.by_region: Dict[str, List[dict]] = {}
+        for model in models:
+            self.by_id.setdefault(model["id"], []).append(model)
+            self.by_name.setdefault(model["name"], []).append(model)
+            self.by_region.setdefault(model["region"], []).append(model)
+        self.regions = sorted(self.by_region)
+        # Entries for the connect form, one per model and region
+        self.choices = [
+            {"id": model["id"], "name": f"{model['name']} ({model['region']})", "region": model["region"]}
+            for model in models
+        ]
+        self.body, self.etag = _serialize({"models": models, "regions": self.regions})
+
+    def supports(self, model_id: str, region: str) -> bool:
+        """Whether model_id is listed for region; anything goes when the catalog is empty"""
+        if not self.models:
+            return True
+        return any(model["region"] == region for model in self.by_id.get(model_id, []))
+
+    def max_tokens(self, model_id: str) -> Optional[int]:
+        entries = self.by_id.get(model_id)
+        return entries[0]["max_tokens"] if entries else None
+
+
+class Catalog:
+    """Model catalog loaded once and reloaded when model_tooluse.txt changes.
+
+    Readers get immutable snapshots, so a reload never disturbs a request that is
+    rendering from the previous one. The file's modification time is checked at
+    most every check_interval seconds.
+    """
+
+    def __init__(self, models_path: str, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        self.models_path = models_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._models = ModelCatalog([])
+        self._models_signature = None
+        self._last_check = 0.0
+        self.reloads = 0
+        self._check(force=True)
+
+    def _check(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            if not force and now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+
+            signature = _file_signature(self.models_path)
+            if signature != self._models_signature:
+                self._models = ModelCatalog(self._load_models())
+                self._models_signature = signature
+                self.reloads += 1
+                logger.info(f"Loaded {len(self._models.models)} models from {self.models_path}")
+
+    def _load_models(self) -> List[dict]:
+        try:
+            with open(self.models_path, 'r') as file:
+                return parse_models(file.read())
+        except FileNotFoundError:
+            return []
+        except Exception as e:
+            logger.error(f"Error loading model data: {str(e)}")
+            return self._models.models
+
+    @property
+    def models(self) -> ModelCatalog:
+        self._check()
+        return self._models
+
+    def stats(self) -> dict:
+        return {
+            "models": len(self._models.models),
+            "reloads": self.reloads,
+        }
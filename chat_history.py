@@ -0,0 +1,67 @@
+# chat_history.py
+import time
+from typing import List, Optional, Tuple
+
+
+class ChatExchange:
+    """One query and its answer as shown in the web chat.
+
+    Only the final text, its pre-rendered HTML, token counts and timing are kept;
+    the agent's messages and tool payloads live in the agent, not in the history.
+    """
+
+    __slots__ = ("query", "response", "html", "input_tokens", "output_tokens", "elapsed_ms", "created_at")
+
+    def __init__(
+        self,
+        query: str,
+        response: str,
+        html: Optional[str] = None,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+        elapsed_ms: float = 0.0,
+        created_at: Optional[float] = None,
+    ):
+        self.query = query
+        self.response = response
+        self.html = html
+        self.input_tokens = input_tokens
+        self.output_tokens = output_tokens
+        self.elapsed_ms = elapsed_ms
+        self.created_at = time.time() if created_at is None else created_at
+
+    def to_dict(self) -> dict:
+        """JSON-compatible form used by shared session stores"""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChatExchange":
+        # Exchanges stored before these records existed only carry query and response
+        return cls(
+            data["query"],
+            data["response"],
+            data.get("html"),
+            data.get("input_tokens", 0),
+            data.get("output_tokens", 0),
+            data.get("elapsed_ms", 0.0),
+            data.get("created_at", 0.0),
+        )
+
+
+def load_history(session: dict) -> List[ChatExchange]:
+    """Return the session's chat history as ChatExchange records, converting stored dicts in place"""
+    history = session["chat_history"]
+    for index, exchange in enumerate(history):
+        if isinstance(exchange, dict):
+            history[index] = ChatExchange.from_dict(exchange)
+    return history
+
+
+def turn_usage(agent) -> Tuple[int, int]:
+    """Input and output tokens of the agent's most recent invocation"""
+    metrics = getattr(agent, "event_loop_metrics", None)
+    invocations = getattr(metrics, "agent_invocations", None)
+    if not invocations:
+        return 0, 0
+    usage = invocations[-1].usage
+    return usage.get("inputTokens", 0), usage.get("outputTokens", 0)
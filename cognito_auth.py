@@ -1,11 +1,9 @@
 # cognito_auth.py
-import boto3
 import os
-from botocore.exceptions import ClientError
 
 class CognitoAuth:
     def __init__(self):
-        self.client = boto3.client('cognito-idp', region_name=os.environ.get('AWS_REGION','us-west-2'))
+        self._client = None
         # Get these values from environment variables
         self.user_pool_id = os.environ.get('COGNITO_USER_POOL_ID','<user pool ID>') #['COGNITO_USER_POOL_ID']
         self.client_id = os.environ.get('COGNITO_CLIENT_ID','<Cognito Client ID>') #['COGNITO_CLIENT_ID']
@@ -16,7 +14,16 @@ class CognitoAuth:
         if not self.user_pool_id or not self.client_id:
             print("Warning: COGNITO_USER_POOL_ID or COGNITO_CLIENT_ID environment variables are not set")
 
+    @property
+    def client(self):
+        # boto3 is slow to import and build; create the client on the first Cognito call
+        if self._client is None:
+            import boto3
+            self._client = boto3.client('cognito-idp', region_name=os.environ.get('AWS_REGION','us-west-2'))
+        return self._client
+
     def authenticate_user(self, email, password):
+        from botocore.exceptions import ClientError
         try:
             response = self.client.initiate_auth(
                 ClientId=self.client_id,
@@ -31,7 +38,11 @@ class CognitoAuth:
             print(f"Error authenticating user: {e}")
             return None
 
-    def get_user_groups(self, email):  # Use email parameter
+    def get_user_groups(self, email, claims=None):  # Use email parameter
+        # Groups from verified token claims avoid a call to Cognito
+        if claims is not None:
+            return list(claims.get('cognito:groups', []))
+        from botocore.exceptions import ClientError
         try:
             response = self.client.admin_list_groups_for_user(
                 Username=email, # Use email as username
@@ -43,6 +54,7 @@ class CognitoAuth:
             return []
 
     def create_user_pool(self):
+        from botocore.exceptions import ClientError
         try:
             response = self.client.create_user_pool(
                 PoolName='AuroraGPTUserPool',
@@ -71,6 +83,7 @@ class CognitoAuth:
             return None
 
     def create_user_pool_client(self):
+        from botocore.exceptions import ClientError
         try:
             response = self.client.create_user_pool_client(
                 UserPoolId=self.user_pool_id,
@@ -84,6 +97,7 @@ class CognitoAuth:
             return None
 
     def create_group(self, group_name, description):
+        from botocore.exceptions import ClientError
         try:
             self.client.create_group(
                 GroupName=group_name,
@@ -96,6 +110,7 @@ class CognitoAuth:
             return False
 
     def create_user(self, username, email, password, group_name):
+        from botocore.exceptions import ClientError
         try:
             # Create user
             self.client.sign_up(
@@ -0,0 +1,155 @@
+# concurrency.py
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+
+from metrics import span
+
+logger = logging.getLogger("strands-agent-api.concurrency")
+
+# Agent turns allowed to run at once across the whole worker
+DEFAULT_MAX_CONCURRENT = int(os.environ.get("AGENT_MAX_CONCURRENT", "200"))
+# Agent turns allowed to run at once for a single user
+DEFAULT_MAX_PER_USER = int(os.environ.get("AGENT_MAX_PER_USER", "4"))
+# Turns allowed to wait for a slot before new ones are rejected
+DEFAULT_MAX_QUEUE = int(os.environ.get("AGENT_MAX_QUEUE", "400"))
+# Seconds a turn may wait for a slot before it is rejected
+DEFAULT_QUEUE_TIMEOUT = float(os.environ.get("AGENT_QUEUE_TIMEOUT", "30"))
+# Value of the Retry-After header sent with rejections
+DEFAULT_RETRY_AFTER = int(os.environ.get("AGENT_RETRY_AFTER", "5"))
+
+
+class QueueFullError(Exception):
+    """Raised when an agent turn cannot be admitted; maps to HTTP 429"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """Global and per-user caps on concurrent agent turns with a bounded wait queue"""
+
+    def __init__(
+        self,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT,
+        max_per_user: int = DEFAULT_MAX_PER_USER,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        queue_timeout: float = DEFAULT_QUEUE_TIMEOUT,
+        retry_after: int = DEFAULT_RETRY_AFTER,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._global = asyncio.Semaphore(max_concurrent)
+        self._per_user: Dict[Tuple[str, int], asyncio.Semaphore] = {}
+        self._per_user_refs: Dict[Tuple[str, int], int] = {}
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def _user_key(self, user_id: str, limit: Optional[int]) -> Tuple[str, int]:
+        # Callers asking for different limits get separate semaphores, each with its own limit
+        return user_id, limit or self.max_per_user
+
+    def _user_semaphore(self, key: Tuple[str, int]) -> asyncio.Semaphore:
+        if key not in self._per_user:
+            self._per_user[key] = asyncio.Semaphore(key[1])
+            self._per_user_refs[key] = 0
+        self._per_user_refs[key] += 1
+        return self._per_user[key]
+
+    def _drop_user_semaphore(self, key: Tuple[str, int]):
+        self._per_user_refs[key] -= 1
+        if self._per_user_refs[key] == 0:
+            del self._per_user[key]
+            del self._per_user_refs[key]
+
+    def _queue_is_full(self, key: Tuple[str, int]) -> bool:
+        user_semaphore = self._per_user.get(key)
+        must_wait = self._global.locked() or (user_semaphore is not None and user_semaphore.locked())
+        return must_wait and self.waiting >= self.max_queue
+
+    def check(self, user_id: str, limit: Optional[int] = None):
+        """Raise QueueFullError if a turn for user_id would be rejected right now"""
+        if self._queue_is_full(self._user_key(user_id, limit)):
+            self.rejected += 1
+            logger.warning(f"Rejecting agent turn for user {user_id}: {self.waiting} turns already queued")
+            raise QueueFullError("Too many queued requests, please retry later", self.retry_after)
+
+    async def acquire(self, user_id: str, limit: Optional[int] = None):
+        """Wait for a slot for user_id, or raise QueueFullError.
+
+        limit overrides max_per_user for user_id, e.g. for a batch's own lane; turns
+        with different limits are admitted independently. Pass the same limit to release.
+        """
+        self.check(user_id, limit)
+        key = self._user_key(user_id, limit)
+        user_semaphore = self._user_semaphore(key)
+
+        # Fast path: both semaphores are free, so acquiring them does not suspend
+        if not (self._global.locked() or user_semaphore.locked()):
+            await self._acquire_both(user_semaphore)
+            self.active += 1
+            self.admitted += 1
+            return
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._acquire_both(user_semaphore), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._drop_user_semaphore(key)
+            self.rejected += 1
+            logger.warning(f"Agent turn for user {user_id} timed out after {self.queue_timeout}s in the queue")
+            raise QueueFullError("Timed out waiting for a free agent slot", self.retry_after)
+        except BaseException:
+            self._drop_user_semaphore(key)
+            raise
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        self.admitted += 1
+
+    async def _acquire_both(self, user_semaphore: asyncio.Semaphore):
+        await user_semaphore.acquire()
+        try:
+            await self._global.acquire()
+        except BaseException:
+            user_semaphore.release()
+            raise
+
+    def release(self, user_id: str, limit: Optional[int] = None):
+        """Return a slot taken by acquire"""
+        key = self._user_key(user_id, limit)
+        self.active -= 1
+        self._global.release()
+        self._per_user[key].release()
+        self._drop_user_semaphore(key)
+
+    @asynccontextmanager
+    async def slot(self, user_id: str, limit: Optional[int] = None):
+        """Hold a slot for the duration of the block"""
+        with span("queue"):
+            await self.acquire(user_id, limit)
+        try:
+            yield
+        finally:
+            self.release(user_id, limit)
+
+    def stats(self) -> dict:
+        """Admission counters for monitoring"""
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "max_concurrent": self.max_concurrent,
+            "max_per_user": self.max_per_user,
+            "max_queue": self.max_queue,
+        }
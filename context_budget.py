@@ -0,0 +1,170 @@
+# context_budget.py
+import json
+import logging
+import os
+import re
+from typing import Optional
+
+from strands.agent.conversation_manager import ConversationManager
+from strands.types.exceptions import ContextWindowOverflowException
+
+from context_stats import ContextStats
+
+logger = logging.getLogger("strands-agent-api.context")
+
+# Multiple of a model's max-token value (from model_tooluse.txt) allowed for retained history
+DEFAULT_BUDGET_MULTIPLIER = int(os.environ.get("CONTEXT_BUDGET_MULTIPLIER", "4"))
+# Budget used when a model has no max-token value
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "16384"))
+# Maximum number of messages kept regardless of size
+DEFAULT_WINDOW_SIZE = int(os.environ.get("CONTEXT_WINDOW_SIZE", "40"))
+# Characters kept from each tool result once it is no longer recent
+DEFAULT_TOOL_RESULT_CHARS = int(os.environ.get("CONTEXT_TOOL_RESULT_CHARS", "2000"))
+# Most recent tool-result messages that are never truncated
+DEFAULT_RECENT_TOOL_RESULTS = int(os.environ.get("CONTEXT_RECENT_TOOL_RESULTS", "2"))
+
+# Marker ending a tool result that was already truncated
+_TRUNCATED = re.compile(r"\n\[\.\.\. \d+ characters truncated[^\]]*\]$")
+
+
+def estimate_tokens(message: dict) -> int:
+    """Approximate token count of a message (about four characters per token)"""
+    return len(json.dumps(message, default=str)) // 4
+
+
+def _is_tool_result_message(message: dict) -> bool:
+    return any("toolResult" in block for block in message.get("content", []))
+
+
+class TokenBudgetConversationManager(ConversationManager):
+    """Keeps a session's history within a per-model token budget.
+
+    After every turn, old tool results are truncated and the oldest exchanges are
+    dropped (sliding window) until the history fits the budget. The first
+    pin_first messages and the system prompt, which is not part of the message
+    list, are always kept.
+    """
+
+    def __init__(
+        self,
+        token_budget: int = DEFAULT_TOKEN_BUDGET,
+        window_size: int = DEFAULT_WINDOW_SIZE,
+        tool_result_chars: int = DEFAULT_TOOL_RESULT_CHARS,
+        recent_tool_results: int = DEFAULT_RECENT_TOOL_RESULTS,
+        pin_first: int = 0,
+        stats: Optional[ContextStats] = None,
+        payload_store=None,
+    ):
+        super().__init__()
+        self.token_budget = token_budget
+        self.window_size = window_size
+        self.tool_result_chars = tool_result_chars
+        self.recent_tool_results = recent_tool_results
+        self.pin_first = pin_first
+        self.stats = stats
+        self.payload_store = payload_store
+        self.last_tokens_saved = 0
+
+    def apply_management(self, agent, **kwargs) -> None:
+        """Compact the history after a turn and record the tokens saved"""
+        messages = agent.messages
+        before = sum(estimate_tokens(message) for message in messages)
+
+        truncated = self._truncate_tool_results(messages, self.recent_tool_results)
+        dropped = self._trim_to_budget(messages)
+
+        after = sum(estimate_tokens(message) for message in messages)
+        self.last_tokens_saved = before - after
+        if self.last_tokens_saved > 0:
+            logger.info(
+                f"Context compacted: {before} -> {after} tokens (budget {self.token_budget}), "
+                f"{dropped} messages dropped, {truncated} tool results truncated"
+            )
+        if self.stats:
+            self.stats.record(self.last_tokens_saved, dropped, truncated)
+
+    def reduce_context(self, agent, e: Optional[Exception] = None, **kwargs) -> None:
+        """Called when the model reports a context overflow; compact aggressively"""
+        messages = agent.messages
+        truncated = self._truncate_tool_results(messages, 0)
+        dropped = self._trim_to_budget(messages, force=True)
+        if not truncated and not dropped and e is not None:
+            raise ContextWindowOverflowException("Unable to reduce conversation context") from e
+
+    def _truncate_tool_results(self, messages: list, keep_recent: int) -> int:
+        """Shorten text in tool results older than the keep_recent most recent tool-result messages"""
+        tool_result_indexes = [i for i, message in enumerate(messages) if _is_tool_result_message(message)]
+        older = tool_result_indexes[:len(tool_result_indexes) - keep_recent] if keep_recent else tool_result_indexes
+
+        truncated = 0
+        for index in older:
+            for block in messages[index]["content"]:
+                if "toolResult" not in block:
+                    continue
+                for content in block["toolResult"].get("content", []):
+                    text = content.get("text")
+                    if text is not None and len(text) > self.tool_result_chars and not _TRUNCATED.search(text):
+                        content["text"] = self._truncate(text)
+                        truncated += 1
+                    elif "json" in content:
+                        serialized = json.dumps(content["json"], default=str)
+                        if len(serialized) > self.tool_result_chars:
+                            del content["json"]
+                            content["text"] = self._truncate(serialized)
+                            truncated += 1
+        return truncated
+
+    def _truncate(self, text: str) -> str:
+        """Keep the head of a tool result; with a payload store the full text is spilled and referenced by ID"""
+        omitted = len(text) - self.tool_result_chars
+        marker = f"[... {omitted} characters truncated]"
+        if self.payload_store is not None:
+            try:
+                payload_id = self.payload_store.put(text)
+                marker = f"[... {omitted} characters truncated; full result stored as payload {payload_id}]"
+            except OSError as e:
+                logger.warning(f"Could not spill tool result: {str(e)}")
+        return f"{text[:self.tool_result_chars]}\n{marker}"
+
+
+    def _trim_to_budget(self, messages: list, force: bool = False) -> int:
+        """Drop the oldest unpinned exchanges until the history fits the window and budget"""
+        sizes = [estimate_tokens(message) for message in messages]
+        total = sum(sizes)
+        if not force and total <= self.token_budget and len(messages) <= self.window_size:
+            return 0
+
+        # Candidate cut points start a new exchange: a user message that is not a tool result,
+        # so no toolUse is separated from its toolResult. The last one is kept so the
+        # current exchange always survives.
+        cut_points = [
+            i for i in range(self.pin_first + 1, len(messages))
+            if messages[i]["role"] == "user" and not _is_tool_result_message(messages[i])
+        ]
+        if not cut_points:
+            return 0
+
+        cut = None
+        removed_tokens = 0
+        start = self.pin_first
+        for point in cut_points:
+            removed_tokens += sum(sizes[start:point])
+            start = point
+            cut = point
+            remaining = len(messages) - (point - self.pin_first)
+            if total - removed_tokens <= self.token_budget and remaining <= self.window_size and not force:
+                break
+            if force and total - removed_tokens <= self.token_budget // 2:
+                break
+
+        dropped = cut - self.pin_first
+        del messages[self.pin_first:cut]
+        self.removed_message_count += dropped
+        return dropped
+
+
+def token_budget_for(max_tokens: Optional[int]) -> int:
+    """Budget for retained history given a model's max-token value"""
+    if not max_tokens:
+        return DEFAULT_TOKEN_BUDGET
+    return max_tokens * DEFAULT_BUDGET_MULTIPLIER
@@ -0,0 +1,33 @@
+# context_stats.py
+import threading
+
+
+class ContextStats:
+    """Counters shared by every session's conversation manager"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.turns = 0
+        self.turns_compacted = 0
+        self.tokens_saved = 0
+        self.messages_dropped = 0
+        self.tool_results_truncated = 0
+
+    def record(self, tokens_saved: int, messages_dropped: int, tool_results_truncated: int):
+        with self._lock:
+            self.turns += 1
+            if tokens_saved > 0:
+                self.turns_compacted += 1
+            self.tokens_saved += tokens_saved
+            self.messages_dropped += messages_dropped
+            self.tool_results_truncated += tool_results_truncated
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "turns": self.turns,
+                "turns_compacted": self.turns_compacted,
+                "tokens_saved": self.tokens_saved,
+                "messages_dropped": self.messages_dropped,
+                "tool_results_truncated": self.tool_results_truncated,
+            }
@@ -0,0 +1,241 @@
+# mcp_pool.py
+import asyncio
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from tool_cache import ToolCache
+
+logger = logging.getLogger("strands-agent-api.mcp-pool")
+
+# Seconds an unreferenced connection is kept open before it is closed
+DEFAULT_IDLE_TIMEOUT = int(os.environ.get("MCP_POOL_IDLE_TIMEOUT", "600"))
+# Seconds between background health checks of pooled connections
+DEFAULT_HEALTH_INTERVAL = int(os.environ.get("MCP_POOL_HEALTH_INTERVAL", "30"))
+
+
+class PooledConnection:
+    """A long-lived MCP client shared by every session using the same server URL"""
+
+    def __init__(self, server_url: str, on_tools_changed: Optional[Callable[[str, list], None]] = None):
+        # The MCP client stack is slow to import; load it with the first connection
+        from strands.tools.mcp import MCPClient
+        from mcp.client.sse import sse_client
+
+        self.server_url = server_url
+        self.client = MCPClient(
+            lambda: sse_client(server_url),
+            on_tools_changed=self._handle_tools_changed if on_tools_changed else None,
+        )
+        self._on_tools_changed = on_tools_changed
+        self.ref_count = 0
+        self.retired = False
+        self.connected = False
+        self.reconnects = 0
+        self.created_at = time.time()
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+
+    def connect(self):
+        """Open the SSE transport if it is not already open"""
+        with self._lock:
+            if self.connected:
+                return
+            logger.info(f"Opening MCP connection to {self.server_url}")
+            self.client.start()
+            self.connected = True
+
+    def close(self):
+        """Close the SSE transport, leaving the client reusable"""
+        with self._lock:
+            if not self.connected:
+                return
+            self.connected = False
+            try:
+                self.client.stop(None, None, None)
+            except Exception as e:
+                logger.error(f"Error closing MCP connection to {self.server_url}: {str(e)}")
+
+    def reconnect(self):
+        """Restart the transport in place so tools bound to this client stay valid"""
+        logger.warning(f"Reconnecting MCP connection to {self.server_url}")
+        self.close()
+        self.connect()
+        self.reconnects += 1
+
+    def _handle_tools_changed(self, previous_names, tools):
+        """Forward MCP tools/list_changed notifications to the pool"""
+        self._on_tools_changed(self.server_url, tools)
+
+    def list_tools(self):
+        """Fetch the tool list from the server"""
+        self.last_used = time.monotonic()
+        return self.client.list_tools_sync()
+
+    def is_healthy(self) -> bool:
+        """Probe the connection with a cheap list_tools round trip"""
+        if not self.connected:
+            return False
+        try:
+            self.client.list_tools_sync()
+            return True
+        except Exception as e:
+            logger.warning(f"Health check failed for {self.server_url}: {str(e)}")
+            return False
+
+
+class MCPConnectionPool:
+    """Keyed pool of pooled MCP connections, shared across sessions with reference counting"""
+
+    def __init__(
+        self,
+        tool_cache: Optional[ToolCache] = None,
+        idle_timeout: int = DEFAULT_IDLE_TIMEOUT,
+        health_interval: int = DEFAULT_HEALTH_INTERVAL,
+    ):
+        self.tool_cache = tool_cache or ToolCache()
+        self.idle_timeout = idle_timeout
+        self.health_interval = health_interval
+        self._connections: Dict[str, PooledConnection] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, server_url: str) -> PooledConnection:
+        """Return a connected client for server_url and take a reference on it"""
+        with self._lock:
+            connection = self._connections.get(server_url)
+            if connection is None:
+                connection = PooledConnection(server_url, on_tools_changed=self.tool_cache.refresh)
+                self._connections[server_url] = connection
+            connection.ref_count += 1
+            connection.last_used = time.monotonic()
+
+        try:
+            connection.connect()
+        except Exception:
+            self.release(server_url)
+            raise
+        return connection
+
+    def release(self, server_url: str):
+        """Drop a reference taken by acquire; idle connections are evicted later"""
+        with self._lock:
+            connection = self._connections.get(server_url)
+            if connection is None:
+                return
+            connection.ref_count = max(0, connection.ref_count - 1)
+            connection.last_used = time.monotonic()
+
+    def server_changed(self, old_url: str, new_url: Optional[str]):
+        """Follow a registry change to a server's URL, or its removal (new_url is None).
+
+        The old connection is retired: it is closed right away if nobody uses it, or
+        on the next maintenance pass after its sessions end. Pooled connections always
+        use SSE, so other changes to the server leave its connection as it is.
+        """
+        if old_url == new_url:
+            return
+        self.tool_cache.invalidate(old_url)
+
+        with self._lock:
+            connection = self._connections.get(old_url)
+            if connection is None:
+                return
+            connection.retired = True
+            if connection.ref_count > 0:
+                logger.info(f"Retiring MCP connection to {old_url} once its {connection.ref_count} sessions end")
+                return
+            del self._connections[old_url]
+        logger.info(f"Closing MCP connection to retired server URL {old_url}")
+        connection.close()
+
+    def get(self, server_url: str) -> Optional[PooledConnection]:
+        """Return the pooled connection for server_url without taking a reference"""
+        with self._lock:
+            return self._connections.get(server_url)
+
+    def get_tools(self, server_url: str) -> list:
+        """Return the tools for an acquired server, served from the tool cache when fresh"""
+        connection = self.get(server_url)
+        if connection is None:
+            raise KeyError(f"No pooled MCP connection for {server_url}")
+        return self.tool_cache.get_or_load(server_url, connection.list_tools)
+
+    def prewarm(self, server_urls: List[str]):
+        """Open connections ahead of the first connect request"""
+        for server_url in server_urls:
+            try:
+                self.acquire(server_url)
+                self.get_tools(server_url)
+                self.release(server_url)
+            except Exception as e:
+                logger.error(f"Error prewarming MCP connection to {server_url}: {str(e)}")
+
+    def health_check(self):
+        """Reconnect any pooled connection that fails its probe"""
+        with self._lock:
+            connections = list(self._connections.values())
+
+        for connection in connections:
+            if connection.ref_count == 0 and not connection.connected:
+                continue
+            if connection.is_healthy():
+                continue
+            try:
+                connection.reconnect()
+                # The server may have restarted with a different tool set
+                self.tool_cache.invalidate(connection.server_url)
+            except Exception as e:
+                logger.error(f"Error reconnecting to {connection.server_url}: {str(e)}")
+
+    def evict_idle(self) -> int:
+        """Close retired connections and those nobody has referenced for idle_timeout seconds"""
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            for server_url, connection in list(self._connections.items()):
+                idle = now - connection.last_used > self.idle_timeout
+                if connection.ref_count == 0 and (idle or connection.retired):
+                    evicted.append(self._connections.pop(server_url))
+
+        for connection in evicted:
+            logger.info(f"Evicting idle MCP connection to {connection.server_url}")
+            connection.close()
+            self.tool_cache.invalidate(connection.server_url)
+        return len(evicted)
+
+    async def run_maintenance(self):
+        """Background loop that health-checks and evicts pooled connections"""
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await loop.run_in_executor(None, self.evict_idle)
+                await loop.run_in_executor(None, self.health_check)
+            except Exception as e:
+                logger.error(f"MCP pool maintenance error: {str(e)}", exc_info=True)
+
+    def close_all(self):
+        """Close every pooled connection"""
+        with self._lock:
+            connections = list(self._connections.values())
+            self._connections.clear()
+
+        for connection in connections:
+            connection.close()
+        self.tool_cache.invalidate()
+
+    def stats(self) -> dict:
+        """Snapshot of the pool for monitoring"""
+        with self._lock:
+            return {
+                server_url: {
+                    "connected": connection.connected,
+                    "ref_count": connection.ref_count,
+                    "reconnects": connection.reconnects,
+                    "retired": connection.retired,
+                    "idle_seconds": round(time.monotonic() - connection.last_used, 1),
+                }
+                for server_url, connection in self._connections.items()
+            }
@@ -0,0 +1,207 @@
+# metrics.py
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+if TYPE_CHECKING:
+    from strands.hooks import AfterModelCallEvent, BeforeModelCallEvent, HookRegistry
+
+logger = logging.getLogger("strands-agent-api.metrics")
+
+# Export the same spans as OpenTelemetry traces (needs strands-agents[otel] and OTEL_EXPORTER_OTLP_ENDPOINT)
+DEFAULT_TRACING_ENABLED = os.environ.get("OTEL_TRACING_ENABLED", "false").lower() == "true"
+
+# Upper bounds (seconds) shared by every latency histogram
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+SPAN_SECONDS = Histogram(
+    "strands_agent_span_seconds",
+    "Time spent in each stage of an agent turn",
+    ["span"],
+    buckets=LATENCY_BUCKETS,
+)
+MODEL_CALL_SECONDS = Histogram(
+    "strands_agent_model_call_seconds",
+    "Duration of a single model invocation",
+    ["model", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+MODEL_TOKENS = Counter(
+    "strands_agent_model_tokens_total",
+    "Tokens sent to and generated by the model",
+    ["model", "direction"],
+)
+TOOL_CALL_SECONDS = Histogram(
+    "strands_agent_tool_call_seconds",
+    "Duration of an MCP tool call, including cache hits",
+    ["server", "tool", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+TURNS = Counter(
+    "strands_agent_turns_total",
+    "Agent turns by outcome",
+    ["outcome"],
+)
+CANCELLED_TURNS = Counter(
+    "strands_agent_cancelled_turns_total",
+    "Agent turns stopped before they finished, by reason (deadline or disconnect)",
+    ["reason"],
+)
+LIVE_SESSIONS = Gauge("strands_agent_live_sessions", "Sessions with an agent on this worker")
+MCP_CONNECTIONS = Gauge("strands_agent_mcp_connections", "Pooled MCP connections on this worker")
+MCP_CONNECTIONS_IN_USE = Gauge("strands_agent_mcp_connections_in_use", "Pooled MCP connections referenced by a session")
+EXECUTOR_THREADS = Gauge("strands_agent_executor_threads", "Size of the default executor")
+EXECUTOR_BUSY = Gauge("strands_agent_executor_busy", "Executor threads running a task")
+EXECUTOR_QUEUED = Gauge("strands_agent_executor_queued", "Tasks waiting for an executor thread")
+EXECUTOR_SATURATION = Gauge("strands_agent_executor_saturation", "Busy executor threads divided by the executor size")
+
+_tracer = None
+
+
+def setup_tracing(enabled: bool = DEFAULT_TRACING_ENABLED):
+    """Export spans over OTLP when enabled; Strands' own agent, model and tool spans go to the same exporter"""
+    global _tracer
+    if not enabled:
+        return
+    try:
+        from opentelemetry import trace
+        from strands.telemetry import StrandsTelemetry
+
+        StrandsTelemetry().setup_otlp_exporter()
+        _tracer = trace.get_tracer("strands-agent-api")
+        logger.info("OpenTelemetry trace export enabled")
+    except Exception as e:
+        logger.warning(f"OpenTelemetry trace export unavailable: {str(e)}")
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block into strands_agent_span_seconds and, with tracing on, a trace span of the same name"""
+    started = time.perf_counter()
+    if _tracer is None:
+        try:
+            yield
+        finally:
+            SPAN_SECONDS.labels(name).observe(time.perf_counter() - started)
+        return
+
+    with _tracer.start_as_current_span(name, attributes=attributes):
+        try:
+            yield
+        finally:
+            SPAN_SECONDS.labels(name).observe(time.perf_counter() - started)
+
+
+def record_span(name: str, started: float, ended: Optional[float] = None, **attributes):
+    """Record a span measured elsewhere (perf_counter timestamps) without making it the current span.
+
+    Used where a with block cannot wrap the work, e.g. across an async generator's yields.
+    """
+    ended = time.perf_counter() if ended is None else ended
+    SPAN_SECONDS.labels(name).observe(ended - started)
+    if _tracer is not None:
+        offset = time.time_ns() - time.perf_counter_ns()
+        trace_span = _tracer.start_span(name, attributes=attributes, start_time=int(started * 1e9) + offset)
+        trace_span.end(end_time=int(ended * 1e9) + offset)
+
+
+def record_tool_call(server_url: str, tool_name: str, outcome: str, started: float):
+    """Record one MCP tool call; outcome is hit, coalesced, miss, uncached, timeout, cancelled or error"""
+    ended = time.perf_counter()
+    TOOL_CALL_SECONDS.labels(server_url, tool_name, outcome).observe(ended - started)
+    record_span("tool", started, ended, **{"mcp.server": server_url, "mcp.tool": tool_name, "cache.outcome": outcome})
+
+
+class ModelCallMetrics:
+    """Agent hook that times each model invocation and counts its input and output tokens.
+
+    Satisfies Strands' HookProvider protocol without importing Strands, so the
+    metrics module loads before the agent stack.
+    """
+
+    def __init__(self, model_id: str):
+        self.model_id = model_id
+
+    def register_hooks(self, registry: "HookRegistry", **kwargs):
+        from strands.hooks import AfterModelCallEvent, BeforeModelCallEvent
+
+        registry.add_callback(BeforeModelCallEvent, self.before_model_call)
+        registry.add_callback(AfterModelCallEvent, self.after_model_call)
+
+    def before_model_call(self, event: "BeforeModelCallEvent"):
+        event.invocation_state["model_call_started"] = time.perf_counter()
+
+    def after_model_call(self, event: "AfterModelCallEvent"):
+        started = event.invocation_state.pop("model_call_started", None)
+        if started is None:
+            return
+        outcome = "error" if event.exception is not None else "ok"
+        MODEL_CALL_SECONDS.labels(self.model_id, outcome).observe(time.perf_counter() - started)
+
+        usage = {}
+        if event.stop_response is not None:
+            usage = event.stop_response.message.get("metadata", {}).get("usage", {})
+        input_tokens, output_tokens = usage.get("inputTokens", 0), usage.get("outputTokens", 0)
+        MODEL_TOKENS.labels(self.model_id, "input").inc(input_tokens)
+        MODEL_TOKENS.labels(self.model_id, "output").inc(output_tokens)
+        record_span(
+            "model", started, model=self.model_id, outcome=outcome,
+            input_tokens=input_tokens, output_tokens=output_tokens
+        )
+
+
+class InstrumentedThreadPoolExecutor(concurrent.futures.ThreadPoolExecutor):
+    """ThreadPoolExecutor that records how long tasks wait for a thread and how busy the threads are"""
+
+    def __init__(self, max_workers: int, **kwargs):
+        super().__init__(max_workers=max_workers, **kwargs)
+        self.busy = 0
+        self.queued = 0
+        self._counter_lock = threading.Lock()
+
+    def submit(self, fn: Callable, /, *args, **kwargs):
+        submitted = time.perf_counter()
+        with self._counter_lock:
+            self.queued += 1
+
+        def run():
+            SPAN_SECONDS.labels("executor_queue").observe(time.perf_counter() - submitted)
+            with self._counter_lock:
+                self.queued -= 1
+                self.busy += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._counter_lock:
+                    self.busy -= 1
+
+        return super().submit(run)
+
+    def stats(self) -> dict:
+        return {"threads": self._max_workers, "busy": self.busy, "queued": self.queued}
+
+
+def render(
+    executor: Optional[InstrumentedThreadPoolExecutor] = None,
+    live_sessions: int = 0,
+    mcp_pool_stats: Optional[dict] = None,
+) -> bytes:
+    """Refresh the gauges and return every metric in the Prometheus text format"""
+    LIVE_SESSIONS.set(live_sessions)
+    connections = (mcp_pool_stats or {}).values()
+    MCP_CONNECTIONS.set(len(connections))
+    MCP_CONNECTIONS_IN_USE.set(sum(1 for connection in connections if connection["ref_count"] > 0))
+    if executor is not None:
+        executor_stats = executor.stats()
+        EXECUTOR_THREADS.set(executor_stats["threads"])
+        EXECUTOR_BUSY.set(executor_stats["busy"])
+        EXECUTOR_QUEUED.set(executor_stats["queued"])
+        EXECUTOR_SATURATION.set(executor_stats["busy"] / executor_stats["threads"])
+    return generate_latest()
+
@@ -0,0 +1,132 @@
+# model_pool.py
+import importlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
+
+if TYPE_CHECKING:
+    from botocore.config import Config
+
+logger = logging.getLogger("strands-agent-api.model-pool")
+
+# Keep-alive HTTP connections per Bedrock client; should cover the concurrent turns per model
+DEFAULT_MAX_POOL_CONNECTIONS = int(os.environ.get("BEDROCK_MAX_POOL_CONNECTIONS", "50"))
+# Seconds to wait for the next chunk of a streamed response
+DEFAULT_READ_TIMEOUT = int(os.environ.get("BEDROCK_READ_TIMEOUT", "120"))
+# Attempts for throttled or failed Bedrock calls
+DEFAULT_MAX_ATTEMPTS = int(os.environ.get("BEDROCK_MAX_ATTEMPTS", "3"))
+# Model providers kept at once; the least recently used are dropped beyond this
+DEFAULT_MAX_CLIENTS = int(os.environ.get("MODEL_POOL_MAX_CLIENTS", "32"))
+# Optional "module:callable" taking (model_id, region) that replaces Bedrock, e.g. for benchmarks
+MODEL_FACTORY = os.environ.get("MODEL_FACTORY")
+
+
+def bedrock_client_config(
+    max_pool_connections: int = DEFAULT_MAX_POOL_CONNECTIONS,
+    read_timeout: int = DEFAULT_READ_TIMEOUT,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+) -> "Config":
+    """botocore settings for a long-lived, shared Bedrock runtime client"""
+    from botocore.config import Config
+
+    return Config(
+        max_pool_connections=max_pool_connections,
+        tcp_keepalive=True,
+        connect_timeout=10,
+        read_timeout=read_timeout,
+        retries={"max_attempts": max_attempts, "mode": "adaptive"},
+    )
+
+
+def create_bedrock_model(model_id: str, region: str):
+    """Default factory: a Bedrock model provider with its own keep-alive client"""
+    from strands.models.bedrock import BedrockModel
+
+    return BedrockModel(model_id=model_id, region_name=region, boto_client_config=bedrock_client_config())
+
+
+def load_factory(spec: str) -> Callable:
+    """Resolve a "module:callable" factory specification"""
+    module_name, _, attribute = spec.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+class ModelPool:
+    """Shares one model provider (and its Bedrock client) per (model_id, region).
+
+    Model providers hold no per-conversation state, so every session using the
+    same model and region reuses the same client and its HTTP connection pool.
+    validate, if given, is called with (model_id, region) before a provider is
+    created; pairs it rejects raise ValueError. At most max_clients providers are
+    kept; agents still using a dropped one keep working with it.
+    """
+
+    def __init__(
+        self,
+        factory: Optional[Callable] = None,
+        validate: Optional[Callable[[str, str], bool]] = None,
+        max_clients: int = DEFAULT_MAX_CLIENTS,
+    ):
+        # A MODEL_FACTORY module is imported with the first model, not at startup
+        self.factory = factory
+        self.validate = validate
+        self.max_clients = max_clients
+        self._models: "OrderedDict[Tuple[str, str], object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+
+    def get(self, model_id: str, region: str):
+        """Return the shared model provider for model_id in region, creating it on first use"""
+        key = (model_id, region)
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                self.hits += 1
+                return model
+            if self.factory is None:
+                self.factory = load_factory(MODEL_FACTORY) if MODEL_FACTORY else create_bedrock_model
+                if MODEL_FACTORY:
+                    logger.info(f"Using model factory {MODEL_FACTORY}")
+            factory = self.factory
+
+        if self.validate is not None and not self.validate(model_id, region):
+            raise ValueError(f"Model {model_id} is not available in {region}")
+
+        # Building a client is slow; other models stay available meanwhile
+        logger.info(f"Creating model client for {model_id} in {region}")
+        created = factory(model_id, region)
+
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                # Another caller created the same provider first; use theirs
+                self._models.move_to_end(key)
+                self.hits += 1
+                return model
+            self.misses += 1
+            self._models[key] = created
+            while len(self._models) > self.max_clients:
+                self._models.popitem(last=False)
+                self.evicted += 1
+            return created
+
+    def set_factory(self, factory: Callable):
+        """Replace the model factory and drop the providers it created"""
+        with self._lock:
+            self.factory = factory
+            self._models.clear()
+
+    def stats(self) -> dict:
+        """Client reuse counters for monitoring"""
+        with self._lock:
+            return {
+                "clients": [f"{model_id}@{region}" for model_id, region in self._models],
+                "hits": self.hits,
+                "misses": self.misses,
+                "evicted": self.evicted,
+            }
@@ -0,0 +1,150 @@
+# oauth_client.py
+import asyncio
+import base64
+import logging
+import os
+import random
+from typing import Optional
+
+import httpx
+
+logger = logging.getLogger("strands-agent-api.oauth")
+
+# Seconds allowed for connecting to and reading from the Cognito endpoints
+DEFAULT_TIMEOUT = float(os.environ.get("AUTH_HTTP_TIMEOUT", "10"))
+# Attempts for a call that failed before Cognito could process it
+DEFAULT_MAX_ATTEMPTS = int(os.environ.get("AUTH_HTTP_MAX_ATTEMPTS", "3"))
+# Keep-alive connections held open to the Cognito domain
+DEFAULT_MAX_CONNECTIONS = int(os.environ.get("AUTH_HTTP_MAX_CONNECTIONS", "20"))
+
+# Responses after which a repeatable request (refresh, revoke) is sent again
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+# Responses that mean Cognito itself turned the request away unprocessed. A gateway
+# error (502, 504) may arrive after a single-use authorization code was consumed.
+UNPROCESSED_STATUS_CODES = {429, 503}
+# Transport failures that happen before the request reaches the server
+RETRY_EXCEPTIONS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+
+
+class OAuthError(Exception):
+    """Raised when Cognito rejects a token request"""
+
+
+class CognitoOAuthClient:
+    """Cognito OAuth endpoints over one shared, keep-alive async HTTP client.
+
+    Refresh and revocation are retried on transient failures. The code exchange is
+    retried only when Cognito cannot have processed the request, so a single-use
+    authorization code is never sent twice after it was accepted.
+    """
+
+    def __init__(
+        self,
+        domain: str,
+        client_id: str,
+        client_secret: Optional[str],
+        redirect_uri: str,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    ):
+        self.domain = domain
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self.redirect_uri = redirect_uri
+        self.timeout = timeout
+        self.max_attempts = max_attempts
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+
+    async def start(self):
+        """Create the shared HTTP client; called at application startup"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=f"https://{self.domain}",
+                timeout=httpx.Timeout(self.timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+
+    async def close(self):
+        """Close the shared HTTP client; called at application shutdown"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def _headers(self) -> dict:
+        headers = {"Content-Type": "application/x-www-form-urlencoded"}
+        if self.client_secret:
+            auth_header = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode()).decode()
+            headers["Authorization"] = f"Basic {auth_header}"
+        return headers
+
+    async def _post(self, path: str, data: dict, retry_status_codes=RETRY_STATUS_CODES) -> httpx.Response:
+        """POST a form to Cognito, retrying connect failures and retry_status_codes with backoff"""
+        await self.start()
+        for attempt in range(1, self.max_attempts + 1):
+            self.requests += 1
+            try:
+                response = await self._client.post(path, data=data, headers=self._headers())
+                if response.status_code not in retry_status_codes or attempt == self.max_attempts:
+                    return response
+                logger.warning(f"Cognito {path} returned {response.status_code}, retrying")
+            except RETRY_EXCEPTIONS as e:
+                if attempt == self.max_attempts:
+                    self.failures += 1
+                    raise
+                logger.warning(f"Cognito {path} request failed ({type(e).__name__}), retrying")
+            self.retries += 1
+            await asyncio.sleep(0.2 * 2 ** (attempt - 1) * (1 + random.random()))
+
+    async def _token_request(self, data: dict, retry_status_codes=RETRY_STATUS_CODES) -> dict:
+        response = await self._post("/oauth2/token", data, retry_status_codes)
+        try:
+            tokens = response.json()
+        except ValueError:
+            # e.g. an HTML error page from a load balancer in front of Cognito
+            self.failures += 1
+            raise OAuthError(f"Unexpected response from Cognito (HTTP {response.status_code})")
+        if "error" in tokens:
+            self.failures += 1
+            raise OAuthError(tokens["error"])
+        return tokens
+
+    async def exchange_code(self, code: str) -> dict:
+        """Exchange an authorization code for ID, access and refresh tokens"""
+        return await self._token_request({
+            "grant_type": "authorization_code",
+            "client_id": self.client_id,
+            "code": code,
+            "redirect_uri": self.redirect_uri,
+        }, UNPROCESSED_STATUS_CODES)
+
+    async def refresh(self, refresh_token: str) -> dict:
+        """Obtain new ID and access tokens with a refresh token"""
+        return await self._token_request({
+            "grant_type": "refresh_token",
+            "client_id": self.client_id,
+            "refresh_token": refresh_token,
+        })
+
+    async def revoke(self, refresh_token: str) -> bool:
+        """Revoke a refresh token and the access tokens issued from it"""
+        response = await self._post("/oauth2/revoke", {"token": refresh_token, "client_id": self.client_id})
+        if response.status_code != 200:
+            self.failures += 1
+            logger.warning(f"Token revocation failed with status {response.status_code}")
+            return False
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+        }
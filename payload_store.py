@@ -0,0 +1,130 @@
+# payload_store.py
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger("strands-agent-api.payload-store")
+
+# Directory holding tool payloads spilled out of session memory
+DEFAULT_DIRECTORY = os.environ.get("TOOL_PAYLOAD_DIR", os.path.join("data", "payloads"))
+# Total bytes kept on disk; the least recently used payloads are deleted beyond this
+DEFAULT_MAX_BYTES = int(os.environ.get("TOOL_PAYLOAD_MAX_BYTES", str(512 * 1024 * 1024)))
+
+_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class PayloadStore:
+    """Size-capped, content-addressed store of large tool results on local disk.
+
+    Payloads are written once under their SHA-256 based ID and read back by ID.
+    When the directory grows beyond max_bytes the least recently used payloads
+    are deleted, so a reference may outlive its payload; get returns None then.
+    """
+
+    def __init__(self, directory: str = DEFAULT_DIRECTORY, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # payload_id -> (size, last_used); the order of last_used drives eviction
+        self._index: Dict[str, Tuple[int, float]] = {}
+        self.total_bytes = 0
+        self.spilled = 0
+        self.evicted = 0
+        self.reads = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._scan()
+
+    def _scan(self):
+        # Payloads written by earlier runs or other workers sharing the directory
+        for name in os.listdir(self.directory):
+            payload_id, extension = os.path.splitext(name)
+            if extension != ".txt" or not _ID_PATTERN.match(payload_id):
+                continue
+            stat = os.stat(os.path.join(self.directory, name))
+            self._index[payload_id] = (stat.st_size, stat.st_mtime)
+            self.total_bytes += stat.st_size
+
+    def _path(self, payload_id: str) -> str:
+        return os.path.join(self.directory, payload_id + ".txt")
+
+    def put(self, text: str) -> str:
+        """Store text and return its ID"""
+        data = text.encode("utf-8")
+        payload_id = hashlib.sha256(data).hexdigest()[:32]
+        path = self._path(payload_id)
+
+        with self._lock:
+            if payload_id in self._index and os.path.exists(path):
+                # Same content spilled again (e.g. the same query result); refresh its recency
+                os.utime(path)
+                self._index[payload_id] = (len(data), os.path.getmtime(path))
+                return payload_id
+
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        with self._lock:
+            previous = self._index.get(payload_id)
+            self.total_bytes += len(data) - (previous[0] if previous else 0)
+            self._index[payload_id] = (len(data), os.path.getmtime(path))
+            self.spilled += 1
+            self._evict()
+        return payload_id
+
+    def get(self, payload_id: str) -> Optional[str]:
+        """Return the payload, or None if the ID is unknown or the payload was evicted"""
+        if not _ID_PATTERN.match(payload_id):
+            return None
+        path = self._path(payload_id)
+        try:
+            with open(path, "rb") as payload_file:
+                data = payload_file.read()
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.reads += 1
+            if payload_id not in self._index:
+                # Spilled by another worker sharing the directory
+                self.total_bytes += len(data)
+            self._index[payload_id] = (len(data), os.path.getmtime(path))
+        return data.decode("utf-8")
+
+    def _evict(self):
+        if self.total_bytes <= self.max_bytes:
+            return
+        for payload_id, (size, _) in sorted(self._index.items(), key=lambda item: item[1][1]):
+            if self.total_bytes <= self.max_bytes:
+                break
+            try:
+                os.unlink(self._path(payload_id))
+            except FileNotFoundError:
+                pass
+            del self._index[payload_id]
+            self.total_bytes -= size
+            self.evicted += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "payloads": len(self._index),
+                "bytes": self.total_bytes,
+                "max_bytes": self.max_bytes,
+                "spilled": self.spilled,
+                "evicted": self.evicted,
+                "reads": self.reads,
+                "misses": self.misses,
+            }
@@ -0,0 +1,206 @@
+# response_cache.py
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger("strands-agent-api.response-cache")
+
+# The cache is opt-in: answers may depend on data that changes between identical questions
+DEFAULT_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+# Seconds a cached response is served
+DEFAULT_TTL = int(os.environ.get("RESPONSE_CACHE_TTL", "600"))
+# Maximum number of cached responses; least recently used are evicted beyond this
+DEFAULT_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+# Bedrock embedding model for the similarity tier; empty disables it
+DEFAULT_EMBEDDING_MODEL = os.environ.get("RESPONSE_CACHE_EMBEDDING_MODEL", "")
+# Minimum cosine similarity for a similarity-tier hit
+DEFAULT_SIMILARITY = float(os.environ.get("RESPONSE_CACHE_SIMILARITY", "0.95"))
+
+
+def normalize_query(query: str) -> str:
+    """Case-, whitespace- and trailing-punctuation-insensitive form of a query"""
+    return re.sub(r"\s+", " ", query).strip().rstrip("?.!").strip().lower()
+
+
+def tool_fingerprint(tool_specs: List[dict]) -> str:
+    """Hash of the tool names and input schemas, so a changed tool set misses the cache"""
+    specs = sorted(
+        (spec["name"], json.dumps(spec.get("inputSchema", {}), sort_keys=True, default=str))
+        for spec in tool_specs
+    )
+    return hashlib.sha1(json.dumps(specs).encode()).hexdigest()[:16]
+
+
+def bedrock_embedder(model_id: str, region: Optional[str] = None) -> Callable[[str], List[float]]:
+    """Embedding function backed by a Bedrock Titan text embedding model"""
+    import boto3
+
+    client = boto3.client("bedrock-runtime", region_name=region or os.environ.get("AWS_REGION", "us-west-2"))
+
+    def embed(text: str) -> List[float]:
+        response = client.invoke_model(modelId=model_id, body=json.dumps({"inputText": text}))
+        return json.loads(response["body"].read())["embedding"]
+
+    return embed
+
+
+def _unit(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+class CacheEntry:
+    __slots__ = ("response", "expires_at", "vector")
+
+    def __init__(self, response: str, expires_at: float, vector: Optional[List[float]]):
+        self.response = response
+        self.expires_at = expires_at
+        self.vector = vector
+
+
+class CacheLookup:
+    """Outcome of a lookup; passed back to store so the query is not embedded twice"""
+
+    def __init__(self, partition: Tuple[str, str, str], query: str):
+        self.partition = partition
+        self.query = query
+        self.vector: Optional[List[float]] = None
+        self.response: Optional[str] = None
+        self.tier: Optional[str] = None
+
+
+class ResponseCache:
+    """Agent responses keyed on (server_url, model_id, tool fingerprint, normalized query).
+
+    The exact tier matches normalized query text. The optional similarity tier
+    embeds the query and serves the closest cached response in the same
+    partition when its cosine similarity reaches the threshold. The key carries
+    no conversation, so callers only use the cache for a session's first turn.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = DEFAULT_ENABLED,
+        ttl: int = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        embedder: Optional[Callable[[str], List[float]]] = None,
+        similarity: float = DEFAULT_SIMILARITY,
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.max_entries = max_entries
+        if embedder is None and enabled and DEFAULT_EMBEDDING_MODEL:
+            embedder = bedrock_embedder(DEFAULT_EMBEDDING_MODEL)
+        self.embedder = embedder
+        self.similarity = similarity
+        self._entries: "OrderedDict[Tuple[Tuple[str, str, str], str], CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = {"exact": 0, "semantic": 0}
+        self.misses = 0
+        self.bypassed = 0
+        self.skipped = 0
+        self.invalidations = 0
+
+    def prepare(self, server_url: str, model_id: str, tool_specs: List[dict], query: str) -> CacheLookup:
+        """Build the cache key for a query without consulting the cache"""
+        return CacheLookup((server_url, model_id, tool_fingerprint(tool_specs)), normalize_query(query))
+
+    async def find(self, result: CacheLookup) -> CacheLookup:
+        """Fill in a cached response for a prepared lookup; response stays None on a miss"""
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get((result.partition, result.query))
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end((result.partition, result.query))
+                self.hits["exact"] += 1
+                result.response, result.tier = entry.response, "exact"
+                return result
+
+        if self.embedder is not None:
+            try:
+                result.vector = _unit(await asyncio.to_thread(self.embedder, result.query))
+            except Exception as e:
+                logger.warning(f"Query embedding failed: {str(e)}")
+            # The scan is a pure-Python dot product per entry; keep it off the event loop
+            if result.vector is not None and await asyncio.to_thread(self._find_similar, result, now):
+                return result
+
+        with self._lock:
+            self.misses += 1
+        return result
+
+    def _find_similar(self, result: CacheLookup, now: float) -> bool:
+        best_key, best_score = None, self.similarity
+        with self._lock:
+            for key, candidate in self._entries.items():
+                if key[0] != result.partition or candidate.vector is None or candidate.expires_at <= now:
+                    continue
+                score = sum(a * b for a, b in zip(result.vector, candidate.vector))
+                if score >= best_score:
+                    best_key, best_score = key, score
+            if best_key is None:
+                return False
+            self._entries.move_to_end(best_key)
+            self.hits["semantic"] += 1
+            result.response, result.tier = self._entries[best_key].response, "semantic"
+            return True
+
+    def store(self, lookup: CacheLookup, response: str):
+        """Cache the response computed after a miss"""
+        with self._lock:
+            key = (lookup.partition, lookup.query)
+            self._entries[key] = CacheEntry(response, time.monotonic() + self.ttl, lookup.vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def record_skip(self):
+        """Count a follow-up turn, which depends on its conversation and is never cached"""
+        with self._lock:
+            self.skipped += 1
+
+    def invalidate(self, server_url: Optional[str] = None):
+        """Drop cached responses for server_url, or for every server when None"""
+        with self._lock:
+            if server_url is None:
+                self._entries.clear()
+            else:
+                # Multi-server sessions partition on their space-separated server URLs
+                for key in [key for key in self._entries if server_url in key[0][0].split(" ")]:
+                    del self._entries[key]
+            self.invalidations += 1
+
+    def hit_rate(self) -> float:
+        with self._lock:
+            hits = sum(self.hits.values())
+            lookups = hits + self.misses
+            return round(hits / lookups, 3) if lookups else 0.0
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring"""
+        hit_rate = self.hit_rate()
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "hits": dict(self.hits),
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "skipped": self.skipped,
+                "hit_rate": hit_rate,
+                "invalidations": self.invalidations,
+                "similarity_tier": self.embedder is not None,
+            }
@@ -0,0 +1,189 @@
+# server_registry.py
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import stat
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
+
+logger = logging.getLogger("strands-agent-api.server-registry")
+
+# Seconds between checks for changes written by other workers or by hand
+DEFAULT_CHECK_INTERVAL = float(os.environ.get("SERVER_REGISTRY_CHECK_INTERVAL", "5"))
+
+
+def _file_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ServerSnapshot:
+    """Immutable view of the registered servers"""
+
+    def __init__(self, servers: Dict[str, dict]):
+        self.by_name = servers
+        self.servers = [{"name": name, **info} for name, info in servers.items()]
+        self.body = json.dumps({"servers": self.servers}, separators=(",", ":")).encode()
+        self.etag = f'"{hashlib.sha1(self.body).hexdigest()}"'
+
+
+class ServerRegistry:
+    """MCP servers from mcp_servers.json with atomic, cross-process-safe updates.
+
+    Readers use an in-memory copy-on-write snapshot and never touch disk. Writers
+    take an exclusive file lock, re-read the file so updates from other workers are
+    not lost, and replace it with write-then-rename. Each server carries a version
+    that is bumped whenever it is updated here; listeners are told about changed
+    servers so pooled connections can follow a new URL.
+    """
+
+    def __init__(self, path: str, check_interval: float = DEFAULT_CHECK_INTERVAL):
+        self.path = path
+        self.lock_path = path + ".lock"
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str, Optional[dict], Optional[dict]], None]] = []
+        self._signature = None
+        self.snapshot = ServerSnapshot({})
+        self.reloads = 0
+        self.writes = 0
+        self.refresh()
+
+    @property
+    def servers(self) -> List[dict]:
+        return self.snapshot.servers
+
+    def get(self, name: str) -> Optional[dict]:
+        return self.snapshot.by_name.get(name)
+
+    def subscribe(self, listener: Callable[[str, Optional[dict], Optional[dict]], None]):
+        """Call listener(name, old, new) whenever a server is added, changed or removed"""
+        self._listeners.append(listener)
+
+    @contextmanager
+    def _file_lock(self):
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            with open(self.lock_path, "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _read(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, "r") as f:
+                config = json.load(f)
+        except FileNotFoundError:
+            return {}
+        servers = {}
+        for name, info in config.get("mcpServers", {}).items():
+            servers[name] = {**info, "version": info.get("version", 1)}
+        return servers
+
+    def _write(self, servers: Dict[str, dict]):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".mcp_servers.", suffix=".tmp")
+        try:
+            # mkstemp creates the file as 0600 and os.replace keeps that; keep the file readable as before
+            try:
+                mode = stat.S_IMODE(os.stat(self.path).st_mode)
+            except FileNotFoundError:
+                mode = 0o644
+            os.fchmod(fd, mode)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"mcpServers": servers}, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _publish(self, servers: Dict[str, dict]) -> List[Tuple[str, Optional[dict], Optional[dict]]]:
+        """Swap in a new snapshot and return the servers whose entry changed"""
+        previous = self.snapshot.by_name
+        self.snapshot = ServerSnapshot(servers)
+        changes = []
+        for name in set(previous) | set(servers):
+            old, new = previous.get(name), servers.get(name)
+            if old != new:
+                changes.append((name, old, new))
+        return changes
+
+    def _notify(self, changes: List[Tuple[str, Optional[dict], Optional[dict]]]):
+        for name, old, new in changes:
+            for listener in self._listeners:
+                try:
+                    listener(name, old, new)
+                except Exception as e:
+                    logger.error(f"Server registry listener failed for {name}: {str(e)}", exc_info=True)
+
+    def refresh(self) -> bool:
+        """Reload the file if it changed since it was last read; returns True on reload"""
+        signature = _file_signature(self.path)
+        if signature == self._signature:
+            return False
+        with self._file_lock():
+            try:
+                servers = self._read()
+            except Exception as e:
+                logger.error(f"Error loading server config: {str(e)}")
+                return False
+            self._signature = _file_signature(self.path)
+            changes = self._publish(servers)
+        self.reloads += 1
+        logger.info(f"Loaded {len(servers)} servers from {self.path}")
+        self._notify(changes)
+        return True
+
+    def upsert(self, name: str, info: dict) -> dict:
+        """Add or update a server and return its stored entry"""
+        with self._file_lock():
+            servers = self._read()
+            current = servers.get(name)
+            entry = {**info, "version": current["version"] if current else 1}
+            if current is not None and current != entry:
+                entry["version"] = current["version"] + 1
+            if current == entry:
+                return current
+            servers[name] = entry
+            self._write(servers)
+            self._signature = _file_signature(self.path)
+            self.writes += 1
+            changes = self._publish(servers)
+        logger.info(f"Registered server {name} at {info.get('url')} (version {entry['version']})")
+        self._notify(changes)
+        return entry
+
+    async def run(self):
+        """Background loop that picks up changes made by other workers"""
+        loop = asyncio.get_event_loop()
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await loop.run_in_executor(None, self.refresh)
+            except Exception as e:
+                logger.error(f"Server registry refresh error: {str(e)}", exc_info=True)
+
+    def stats(self) -> dict:
+        return {
+            "servers": len(self.snapshot.servers),
+            "reloads": self.reloads,
+            "writes": self.writes,
+        }
@@ -0,0 +1,156 @@
+# session_store.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger("strands-agent-api.session-store")
+
+
+def json_default(value):
+    """JSON fallback for session values: compact records (e.g. chat exchanges) provide to_dict"""
+    to_dict = getattr(value, "to_dict", None)
+    return to_dict() if to_dict is not None else str(value)
+
+
+class SessionStore(ABC):
+    """Persists the serializable part of a session (history, model, server, metadata).
+
+    Sessions are plain JSON-compatible dicts. A shared backend (SQLite on a shared
+    volume, or a Redis-like store implementing these methods) lets any worker serve
+    any session; agents are rebuilt from the stored messages on first use.
+    """
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[dict]:
+        """Return the session, or None if it does not exist"""
+
+    @abstractmethod
+    def put(self, session_id: str, session: dict):
+        """Create or replace the session"""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """Remove the session; returns False if it did not exist"""
+
+    @abstractmethod
+    def list_ids(self) -> List[str]:
+        """Return the IDs of every stored session"""
+
+    def list_activity(self) -> Dict[str, Tuple[float, float]]:
+        """Return (created_at, last_active) for every stored session"""
+        activity = {}
+        for session_id in self.list_ids():
+            session = self.get(session_id)
+            if session is not None:
+                activity[session_id] = (session.get("created_at", 0), session.get("last_active", 0))
+        return activity
+
+    def close(self):
+        """Release any resources held by the backend"""
+
+
+class InMemorySessionStore(SessionStore):
+    """Process-local store; sessions are lost on restart and not shared between workers"""
+
+    def __init__(self):
+        self._sessions: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[dict]:
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def put(self, session_id: str, session: dict):
+        with self._lock:
+            self._sessions[session_id] = session
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def list_ids(self) -> List[str]:
+        with self._lock:
+            return list(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """File-backed store shared by every worker that can reach the database file"""
+
+    def __init__(self, path: str, table: str = "sessions"):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} ("
+                "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections are not thread-safe, so keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id: str) -> Optional[dict]:
+        row = self._connection().execute(
+            f"SELECT data FROM {self.table} WHERE session_id = ?", (session_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, session_id: str, session: dict):
+        with self._connection() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (session_id, data, updated_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(session, default=json_default), time.time())
+            )
+
+    def delete(self, session_id: str) -> bool:
+        with self._connection() as conn:
+            cursor = conn.execute(f"DELETE FROM {self.table} WHERE session_id = ?", (session_id,))
+            return cursor.rowcount > 0
+
+    def list_ids(self) -> List[str]:
+        rows = self._connection().execute(f"SELECT session_id FROM {self.table}").fetchall()
+        return [row[0] for row in rows]
+
+    def list_activity(self) -> Dict[str, Tuple[float, float]]:
+        # Read the timestamps without deserializing whole sessions
+        rows = self._connection().execute(
+            "SELECT session_id, json_extract(data, '$.created_at'), json_extract(data, '$.last_active') "
+            f"FROM {self.table}"
+        ).fetchall()
+        return {row[0]: (row[1] or 0, row[2] or 0) for row in rows}
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def create_session_store(backend: Optional[str] = None, table: str = "sessions") -> SessionStore:
+    """Build the store selected by SESSION_STORE (memory or sqlite).
+
+    table namespaces records so other server-side state (e.g. logins) can share the backend.
+    """
+    backend = (backend or os.environ.get("SESSION_STORE", "memory")).lower()
+    if backend == "memory":
+        return InMemorySessionStore()
+    if backend == "sqlite":
+        path = os.environ.get("SESSION_STORE_PATH", os.path.join("data", "sessions.db"))
+        logger.info(f"Using SQLite {table} store at {path}")
+        return SQLiteSessionStore(path, table)
+    raise ValueError(f"Unknown session store backend: {backend}")
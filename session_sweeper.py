@@ -0,0 +1,157 @@
+# session_sweeper.py
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Callable, Collection, Dict, List, Tuple
+
+from session_store import InMemorySessionStore, SessionStore, json_default
+
+logger = logging.getLogger("strands-agent-api.session-sweeper")
+
+# Seconds without a query before a session is evicted
+DEFAULT_IDLE_TTL = int(os.environ.get("SESSION_IDLE_TTL", "1800"))
+# Seconds after creation when a session is evicted regardless of activity (matches the cookie max_age)
+DEFAULT_MAX_AGE = int(os.environ.get("SESSION_MAX_AGE", "3600"))
+# Maximum number of stored sessions; the least recently used are evicted beyond this
+DEFAULT_MAX_SESSIONS = int(os.environ.get("SESSION_MAX_COUNT", "1000"))
+# Approximate bytes of conversation state this process may hold
+DEFAULT_MEMORY_BUDGET = int(os.environ.get("SESSION_MEMORY_BUDGET_MB", "512")) * 1024 * 1024
+# Seconds between sweeps
+DEFAULT_SWEEP_INTERVAL = int(os.environ.get("SESSION_SWEEP_INTERVAL", "60"))
+
+
+def estimate_session_bytes(session_agent, session: dict) -> int:
+    """Rough size of a session's conversation state in bytes"""
+    messages = json.dumps(session_agent.messages, default=str) if session_agent is not None else ""
+    history = json.dumps(session.get("chat_history", []), default=json_default) if session else ""
+    return len(messages) + len(history)
+
+
+class SessionSweeper:
+    """Evicts expired, idle and excess sessions and keeps local agents within a memory budget.
+
+    Store scans and size estimates run in a worker thread; agents are discarded and
+    sessions deleted on the event loop, which owns session_agents and the MCP pool.
+    Sessions listed in in_flight have a turn running and are never evicted.
+    """
+
+    def __init__(
+        self,
+        session_store: SessionStore,
+        session_agents: Dict[str, dict],
+        discard_agent: Callable[[str], None],
+        idle_ttl: int = DEFAULT_IDLE_TTL,
+        max_age: int = DEFAULT_MAX_AGE,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        interval: int = DEFAULT_SWEEP_INTERVAL,
+        in_flight: Collection[str] = (),
+    ):
+        self.session_store = session_store
+        self.session_agents = session_agents
+        self.discard_agent = discard_agent
+        self.idle_ttl = idle_ttl
+        self.max_age = max_age
+        self.max_sessions = max_sessions
+        self.memory_budget = memory_budget
+        self.interval = interval
+        self.in_flight = in_flight
+        self.evicted = {"idle": 0, "expired": 0, "lru": 0, "memory": 0, "orphaned": 0}
+        self.bytes_reclaimed = 0
+        self.last_sweep_seconds = 0.0
+
+    def _agent_bytes(self, session_id: str, cached: dict) -> int:
+        """Size of a local agent's state, recomputed only when the conversation changed"""
+        if cached.get("size_version") != cached["version"]:
+            cached["size"] = estimate_session_bytes(cached["agent"], self.session_store.get(session_id))
+            cached["size_version"] = cached["version"]
+        return cached["size"]
+
+    def _plan(self, local: Dict[str, dict]) -> List[Tuple[str, str, bool]]:
+        """Choose the sessions to evict as (session_id, reason, delete_stored); reads only.
+
+        local is a snapshot of the idle local agents taken on the event loop.
+        """
+        now = time.time()
+        activity = self.session_store.list_activity()
+        evictions = []
+
+        # Time-based expiry
+        for session_id, (created_at, last_active) in list(activity.items()):
+            if now - created_at > self.max_age:
+                evictions.append((session_id, "expired", True))
+            elif now - last_active > self.idle_ttl:
+                evictions.append((session_id, "idle", True))
+            else:
+                continue
+            del activity[session_id]
+
+        # Local agents whose session was removed elsewhere
+        for session_id in list(local):
+            if session_id not in activity and self.session_store.get(session_id) is None:
+                evictions.append((session_id, "orphaned", False))
+
+        # Cap on total sessions, least recently active first
+        if len(activity) > self.max_sessions:
+            by_activity = sorted(activity, key=lambda sid: activity[sid][1])
+            for session_id in by_activity[:len(activity) - self.max_sessions]:
+                evictions.append((session_id, "lru", True))
+                del activity[session_id]
+
+        # Memory budget for this process. With an in-process store the session itself
+        # is the memory, so it goes; with a shared store only the local agent is dropped
+        # and can be rebuilt on the next query.
+        in_process = isinstance(self.session_store, InMemorySessionStore)
+        for session_id, _, _ in evictions:
+            local.pop(session_id, None)
+        total = sum(self._agent_bytes(session_id, cached) for session_id, cached in local.items())
+        for session_id in sorted(local, key=lambda sid: local[sid].get("last_used", 0)):
+            if total <= self.memory_budget:
+                break
+            total -= local[session_id]["size"]
+            evictions.append((session_id, "memory", in_process))
+        return evictions
+
+    def _evict(self, session_id: str, reason: str, delete_stored: bool):
+        cached = self.session_agents.get(session_id)
+        reclaimed = cached.get("size", 0) if cached else 0
+        self.discard_agent(session_id)
+        if delete_stored:
+            self.session_store.delete(session_id)
+        self.evicted[reason] += 1
+        self.bytes_reclaimed += reclaimed
+        logger.info(f"Evicted session {session_id} ({reason}, ~{reclaimed} bytes)")
+
+    async def sweep(self):
+        """Run one eviction pass"""
+        started = time.monotonic()
+        local = {
+            session_id: cached for session_id, cached in self.session_agents.items()
+            if session_id not in self.in_flight
+        }
+        evictions = await asyncio.to_thread(self._plan, local)
+        for session_id, reason, delete_stored in evictions:
+            # A turn may have started while the store was scanned
+            if session_id not in self.in_flight:
+                self._evict(session_id, reason, delete_stored)
+        self.last_sweep_seconds = time.monotonic() - started
+
+    async def run(self):
+        """Background loop that sweeps sessions every interval seconds"""
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Session sweep error: {str(e)}", exc_info=True)
+
+    def stats(self) -> dict:
+        """Eviction counters for monitoring"""
+        return {
+            "local_agents": len(self.session_agents),
+            "evicted": dict(self.evicted),
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "last_sweep_seconds": round(self.last_sweep_seconds, 3),
+        }
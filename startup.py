@@ -0,0 +1,103 @@
+# startup.py
+import importlib
+import os
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Tuple
+
+# Heavy modules behind the agent stack, in load order. api.py and agent_cli.py import
+# them on first use (or in the background) so the process is serving sooner.
+AGENT_STACK_MODULES = [
+    "strands",
+    "strands.tools.executors",
+    "strands.tools.mcp",
+    "mcp.client.sse",
+    "strands.models.bedrock",
+    "caching_tool",
+    "context_budget",
+    "markdown",
+]
+
+
+def import_modules(modules: List[str]) -> Dict[str, float]:
+    """Import modules in order; returns the seconds each one added (0 if already loaded)"""
+    timings = {}
+    for name in modules:
+        started = time.perf_counter()
+        importlib.import_module(name)
+        timings[name] = time.perf_counter() - started
+    return timings
+
+
+def import_breakdown(module: str, cwd: str = None) -> Tuple[float, List[Tuple[str, float, float]]]:
+    """Import module in a fresh interpreter under -X importtime.
+
+    Returns the module's total import time in seconds and, for each module it
+    imports directly, (name, self seconds, cumulative seconds), slowest first.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd or os.getcwd(), env=os.environ, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{completed.stderr[-2000:]}")
+
+    children, direct = [], []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        head, cumulative_us, name = line.split("|", 2)
+        self_us = head[len("import time:"):].strip()
+        if not self_us.isdigit():
+            continue
+        # One space after the separator, then two per nesting level
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        entry = (name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6)
+        # Children are reported before their parent; depth 1 lines belong to the next depth 0 line
+        if depth == 1:
+            children.append(entry)
+        elif depth == 0:
+            if entry[0] == module:
+                direct = children
+                total = entry[2]
+                break
+            children = []
+    else:
+        raise RuntimeError(f"No import timing reported for {module}")
+    return total, sorted(direct, key=lambda entry: entry[2], reverse=True)
+
+
+class StartupPhases:
+    """Wall-clock durations of named initialization phases, in the order they ran"""
+
+    def __init__(self):
+        self.phases: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def add(self, name: str, seconds: float):
+        self.phases.append((name, seconds))
+
+
+def print_report(module: str, phases: StartupPhases, cwd: str = None, top: int = 15):
+    """Print the import breakdown of module followed by the recorded phases"""
+    total, direct = import_breakdown(module, cwd)
+    print(f"import {module}: {total * 1000:.0f} ms (fresh interpreter)")
+    print(f"  {'module':<40}{'cumulative ms':>15}{'self ms':>10}")
+    for name, self_seconds, cumulative in direct[:top]:
+        print(f"  {name:<40}{cumulative * 1000:>15.1f}{self_seconds * 1000:>10.1f}")
+    if len(direct) > top:
+        rest = sum(entry[2] for entry in direct[top:])
+        print(f"  {f'({len(direct) - top} more)':<40}{rest * 1000:>15.1f}")
+
+    print("initialization:")
+    for name, seconds in phases.phases:
+        print(f"  {name:<40}{seconds * 1000:>15.1f}")
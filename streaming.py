@@ -0,0 +1,64 @@
+# streaming.py
+import json
+import logging
+import threading
+from typing import AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger("strands-agent-api.streaming")
+
+
+def translate_event(event: dict) -> List[Dict]:
+    """Translate a Strands stream event into zero or more client events"""
+    messages = []
+
+    # Incremental model text (reasoning deltas are not shown to the user)
+    if "data" in event and not event.get("reasoning"):
+        messages.append({"type": "text", "data": event["data"]})
+
+    # A completed message: assistant tool requests start tools, user tool results end them
+    elif "message" in event:
+        message = event["message"]
+        for block in message.get("content", []):
+            if message.get("role") == "assistant" and "toolUse" in block:
+                tool_use = block["toolUse"]
+                messages.append({
+                    "type": "tool_start",
+                    "tool_use_id": tool_use.get("toolUseId"),
+                    "name": tool_use.get("name"),
+                    "input": tool_use.get("input")
+                })
+            elif message.get("role") == "user" and "toolResult" in block:
+                tool_result = block["toolResult"]
+                messages.append({
+                    "type": "tool_end",
+                    "tool_use_id": tool_result.get("toolUseId"),
+                    "status": tool_result.get("status")
+                })
+
+    elif "result" in event:
+        if getattr(event["result"], "stop_reason", None) == "cancelled":
+            messages.append({"type": "cancelled"})
+        else:
+            messages.append({"type": "done", "response": str(event["result"])})
+
+    return messages
+
+
+async def stream_agent(agent, query: str, cancel_signal: Optional[threading.Event] = None) -> AsyncIterator[Dict]:
+    """Run one agent turn and yield client events as they happen.
+
+    Setting cancel_signal stops the turn at the agent's next model or tool boundary;
+    the last event is then "cancelled" instead of "done".
+    """
+    try:
+        async for event in agent.stream_async(query, cancel_signal=cancel_signal):
+            for message in translate_event(event):
+                yield message
+    except Exception as e:
+        logger.error(f"Streaming error: {str(e)}", exc_info=True)
+        yield {"type": "error", "error": str(e)}
+
+
+def format_sse(message: Dict) -> str:
+    """Encode a client event as a Server-Sent Events frame"""
+    return f"event: {message['type']}\ndata: {json.dumps(message, default=str)}\n\n"
@@ -0,0 +1,58 @@
+// Web chat helpers: post a query in the background and append only the new
+// exchange, and load earlier history a page at a time when the user scrolls
+// to the top of the chat.
+async function postExchange(sessionId, query) {
+    const response = await fetch('/web/exchange', {
+        method: 'POST',
+        credentials: 'same-origin',
+        body: new URLSearchParams({ session_id: sessionId, query: query })
+    });
+
+    const payload = await response.json();
+    if (!response.ok) {
+        throw new Error(payload.error || ('Request failed with status ' + response.status));
+    }
+    return payload;
+}
+
+function appendExchange(chatHistory, html) {
+    chatHistory.insertAdjacentHTML('beforeend', html);
+    chatHistory.scrollTop = chatHistory.scrollHeight;
+}
+
+function appendError(chatHistory, query, message) {
+    const exchange = document.createElement('div');
+    exchange.className = 'exchange';
+    exchange.innerHTML = '<div class="query"><strong>You:</strong><p></p></div>' +
+        '<div class="response"><strong>Agent:</strong><p></p></div>';
+    exchange.querySelector('.query p').textContent = query;
+    exchange.querySelector('.response p').textContent = 'Error: ' + message;
+    chatHistory.appendChild(exchange);
+    chatHistory.scrollTop = chatHistory.scrollHeight;
+}
+
+// chatHistory.dataset.historyStart holds the index of the oldest exchange shown
+function enableHistoryPaging(chatHistory, sessionId) {
+    let loading = false;
+
+    chatHistory.addEventListener('scroll', async function() {
+        const start = parseInt(chatHistory.dataset.historyStart || '0', 10);
+        if (loading || start <= 0 || chatHistory.scrollTop > 50) return;
+
+        loading = true;
+        try {
+            const params = new URLSearchParams({ session_id: sessionId, before: start });
+            const response = await fetch('/web/history?' + params, { credentials: 'same-origin' });
+            if (!response.ok) return;
+
+            const page = await response.json();
+            const previousHeight = chatHistory.scrollHeight;
+            chatHistory.insertAdjacentHTML('afterbegin', page.html);
+            chatHistory.dataset.historyStart = page.start;
+            // Keep the exchange the user was reading where it was
+            chatHistory.scrollTop += chatHistory.scrollHeight - previousHeight;
+        } finally {
+            loading = false;
+        }
+    });
+}
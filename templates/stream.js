@@ -0,0 +1,42 @@
+// Client for /query/stream: parses Server-Sent Events from a POST response
+// and dispatches each event to handlers[event.type] (text, tool_start,
+// tool_end, done, error).
+async function streamQuery(sessionId, query, handlers) {
+    const response = await fetch('/query/stream', {
+        method: 'POST',
+        credentials: 'same-origin',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({ session_id: sessionId, query: query })
+    });
+
+    if (!response.ok) {
+        throw new Error('Request failed with status ' + response.status);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+
+        // Frames are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const frame = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+
+            const dataLine = frame.split('\n').find(line => line.startsWith('data: '));
+            if (!dataLine) continue;
+
+            const message = JSON.parse(dataLine.slice(6));
+            const handler = handlers[message.type];
+            if (handler) handler(message);
+        }
+    }
+}
@@ -0,0 +1,181 @@
+# token_verifier.py
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+import httpx
+import jwt
+
+logger = logging.getLogger("strands-agent-api.token-verifier")
+
+# Seconds the user pool's signing keys are trusted before they are fetched again
+DEFAULT_JWKS_TTL = int(os.environ.get("JWKS_TTL", "3600"))
+# Minimum seconds between refetches triggered by an unknown key ID
+DEFAULT_JWKS_MIN_REFRESH = int(os.environ.get("JWKS_MIN_REFRESH", "60"))
+# Verified tokens remembered so repeat requests skip signature checks
+DEFAULT_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", "1024"))
+# Seconds of clock skew tolerated when checking expiry
+DEFAULT_LEEWAY = int(os.environ.get("TOKEN_LEEWAY", "30"))
+
+
+class InvalidTokenError(Exception):
+    """Raised when a token is malformed, unsigned by the pool, expired or for another client"""
+
+
+class TokenVerifier:
+    """Verifies Cognito ID and access tokens locally against the user pool's JWKS.
+
+    Keys are cached for jwks_ttl seconds and refetched early when a token names a
+    key ID that is not known yet (key rotation), at most once per min_refresh
+    seconds. A failed fetch is not retried for min_refresh seconds; the keys
+    already loaded keep being used meanwhile. Verified claims are kept in a small LRU keyed by the raw token.
+    """
+
+    def __init__(
+        self,
+        region: str,
+        user_pool_id: str,
+        client_id: str,
+        jwks_ttl: int = DEFAULT_JWKS_TTL,
+        min_refresh: int = DEFAULT_JWKS_MIN_REFRESH,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        leeway: int = DEFAULT_LEEWAY,
+    ):
+        self.issuer = f"https://cognito-idp.{region}.amazonaws.com/{user_pool_id}"
+        self.jwks_url = f"{self.issuer}/.well-known/jwks.json"
+        self.client_id = client_id
+        self.jwks_ttl = jwks_ttl
+        self.min_refresh = min_refresh
+        self.cache_size = cache_size
+        self.leeway = leeway
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._keys_fetched_at = 0.0
+        # No fetch before this time (monotonic) after a failed one
+        self._keys_retry_at = 0.0
+        self._keys_lock = asyncio.Lock()
+        self._verified: "OrderedDict[str, dict]" = OrderedDict()
+        self._client: Optional[httpx.AsyncClient] = None
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.jwks_fetches = 0
+
+    async def start(self):
+        """Create the HTTP client used for JWKS fetches"""
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=httpx.Timeout(10.0))
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _fetch_keys(self):
+        await self.start()
+        response = await self._client.get(self.jwks_url)
+        response.raise_for_status()
+        keys = {}
+        for key in response.json().get("keys", []):
+            keys[key["kid"]] = jwt.PyJWK(key)
+        self._keys = keys
+        self._keys_fetched_at = time.monotonic()
+        self.jwks_fetches += 1
+        logger.info(f"Loaded {len(keys)} signing keys from {self.jwks_url}")
+
+    async def _signing_key(self, kid: str) -> jwt.PyJWK:
+        age = time.monotonic() - self._keys_fetched_at
+        if kid in self._keys and age < self.jwks_ttl:
+            return self._keys[kid]
+
+        async with self._keys_lock:
+            now = time.monotonic()
+            age = now - self._keys_fetched_at
+            expired = age >= self.jwks_ttl
+            # An unknown kid usually means the pool rotated its keys
+            rotated = kid not in self._keys and age >= self.min_refresh
+            if (expired or rotated) and now >= self._keys_retry_at:
+                try:
+                    await self._fetch_keys()
+                except Exception as e:
+                    # Keep verifying with the keys we have if the pool is briefly unreachable, and
+                    # back off so verifications do not queue behind one timed-out fetch after another
+                    logger.error(f"Error fetching JWKS: {str(e)}")
+                    self._keys_retry_at = now + self.min_refresh
+                    self._keys_fetched_at = min(self._keys_fetched_at, now - self.jwks_ttl + self.min_refresh)
+            if not self._keys:
+                raise InvalidTokenError("Signing keys are unavailable")
+
+        if kid not in self._keys:
+            raise InvalidTokenError("Token signed with an unknown key")
+        return self._keys[kid]
+
+    def _cached(self, token: str) -> Optional[dict]:
+        claims = self._verified.get(token)
+        if claims is None:
+            return None
+        if claims["exp"] + self.leeway < time.time():
+            del self._verified[token]
+            return None
+        self._verified.move_to_end(token)
+        return claims
+
+    async def verify(self, token: str, token_use: Optional[str] = None) -> dict:
+        """Return the verified claims of a Cognito token, or raise InvalidTokenError.
+
+        token_use restricts the token to "id" or "access".
+        """
+        claims = self._cached(token)
+        if claims is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            try:
+                claims = await self._decode(token)
+            except InvalidTokenError:
+                self.rejected += 1
+                raise
+            self._verified[token] = claims
+            if len(self._verified) > self.cache_size:
+                self._verified.popitem(last=False)
+
+        if token_use and claims.get("token_use") != token_use:
+            self.rejected += 1
+            raise InvalidTokenError(f"Expected an {token_use} token")
+        return claims
+
+    async def _decode(self, token: str) -> dict:
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError as e:
+            raise InvalidTokenError(f"Malformed token: {str(e)}")
+
+        key = await self._signing_key(header.get("kid", ""))
+        try:
+            claims = jwt.decode(
+                token,
+                key.key,
+                algorithms=["RS256"],
+                issuer=self.issuer,
+                leeway=self.leeway,
+                options={"require": ["exp", "iss", "token_use"], "verify_aud": False},
+            )
+        except jwt.PyJWTError as e:
+            raise InvalidTokenError(str(e))
+
+        # ID tokens name the app client in aud, access tokens in client_id
+        audience = claims.get("aud") if claims["token_use"] == "id" else claims.get("client_id")
+        if audience != self.client_id:
+            raise InvalidTokenError("Token was issued to another client")
+        return claims
+
+    def stats(self) -> dict:
+        return {
+            "cached_tokens": len(self._verified),
+            "hits": self.hits,
+            "misses": self.misses,
+            "rejected": self.rejected,
+            "jwks_fetches": self.jwks_fetches,
+        }
@@ -0,0 +1,91 @@
+# tool_cache.py
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("strands-agent-api.tool-cache")
+
+# Seconds a cached tool list is served before it is fetched again
+DEFAULT_TTL = int(os.environ.get("TOOL_CACHE_TTL", "300"))
+
+
+class ToolCache:
+    """TTL cache of parsed MCP tool lists keyed by server URL"""
+
+    def __init__(self, ttl: int = DEFAULT_TTL):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[list, float]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.invalidations = 0
+        self._listeners: List[Callable[[Optional[str]], None]] = []
+
+    def subscribe(self, listener: Callable[[Optional[str]], None]):
+        """Call listener(server_url) when a server's tools change or are invalidated (None means all)"""
+        self._listeners.append(listener)
+
+    def _notify(self, server_url: Optional[str]):
+        for listener in self._listeners:
+            try:
+                listener(server_url)
+            except Exception as e:
+                logger.error(f"Tool cache listener failed: {str(e)}")
+
+    def get(self, server_url: str) -> Optional[list]:
+        """Return the cached tools for server_url, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(server_url)
+            if entry is None or entry[1] < time.monotonic():
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[0]
+
+    def put(self, server_url: str, tools: list):
+        """Store the tool list for server_url"""
+        with self._lock:
+            self._entries[server_url] = (list(tools), time.monotonic() + self.ttl)
+
+    def get_or_load(self, server_url: str, loader: Callable[[], list]) -> list:
+        """Return cached tools, calling loader on a miss"""
+        tools = self.get(server_url)
+        if tools is None:
+            tools = loader()
+            self.put(server_url, tools)
+        return tools
+
+    def refresh(self, server_url: str, tools: list):
+        """Replace the cached tools after the server announced a change"""
+        logger.info(f"Tool list changed on {server_url}; refreshing cache ({len(tools)} tools)")
+        self.put(server_url, tools)
+        with self._lock:
+            self.refreshes += 1
+        self._notify(server_url)
+
+    def invalidate(self, server_url: Optional[str] = None):
+        """Drop the cached tools for server_url, or for every server when None"""
+        with self._lock:
+            if server_url is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(server_url, None)
+            self.invalidations += 1
+        self._notify(server_url)
+
+    def stats(self) -> dict:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "refreshes": self.refreshes,
+                "invalidations": self.invalidations,
+            }
+
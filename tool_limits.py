@@ -0,0 +1,109 @@
+# tool_limits.py
+import asyncio
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional, Tuple
+
+from metrics import record_span
+
+logger = logging.getLogger("strands-agent-api.tool-limits")
+
+# MCP tool calls allowed to run at once against one server, across all sessions
+DEFAULT_PARALLELISM = int(os.environ.get("MCP_TOOL_PARALLELISM", "8"))
+# Seconds a single MCP tool call may take before the model is told it timed out
+DEFAULT_TIMEOUT = float(os.environ.get("MCP_TOOL_TIMEOUT", "60"))
+
+
+class ServerLimits:
+    """Semaphore and counters for the tool calls made to one server"""
+
+    def __init__(self, parallelism: int):
+        self.parallelism = parallelism
+        self.semaphore = asyncio.Semaphore(parallelism)
+        self.active = 0
+        self.waiting = 0
+        self.calls = 0
+        self.timeouts = 0
+
+
+class ToolCallLimiter:
+    """Per-server caps on concurrent MCP tool calls and a timeout for each call.
+
+    The agent runs the tool uses of one model response concurrently; this keeps a
+    burst of them (from one turn or many sessions) from overloading a server.
+    settings, if given, maps a server URL to its entry in mcp_servers.json, where
+    tool_parallelism and tool_timeout override the defaults for that server.
+    """
+
+    def __init__(
+        self,
+        parallelism: int = DEFAULT_PARALLELISM,
+        timeout: float = DEFAULT_TIMEOUT,
+        settings: Optional[Callable[[str], Optional[dict]]] = None,
+    ):
+        self.parallelism = parallelism
+        self.timeout = timeout
+        self.settings = settings
+        self._servers: Dict[str, ServerLimits] = {}
+
+    def limits_for(self, server_url: str) -> Tuple[int, float]:
+        """Return (parallelism, timeout) for server_url"""
+        server = (self.settings(server_url) if self.settings else None) or {}
+        return (
+            max(1, int(server.get("tool_parallelism", self.parallelism))),
+            float(server.get("tool_timeout", self.timeout)),
+        )
+
+    def _server(self, server_url: str, parallelism: int) -> ServerLimits:
+        limits = self._servers.get(server_url)
+        if limits is None or limits.parallelism != parallelism:
+            # The server's limit was edited; calls already running finish on the old semaphore
+            previous = limits
+            limits = ServerLimits(parallelism)
+            if previous is not None:
+                limits.calls, limits.timeouts = previous.calls, previous.timeouts
+            self._servers[server_url] = limits
+        return limits
+
+    @asynccontextmanager
+    async def slot(self, server_url: str):
+        """Wait for a free call slot on server_url; yields the timeout for the call"""
+        parallelism, timeout = self.limits_for(server_url)
+        limits = self._server(server_url, parallelism)
+        started = time.perf_counter()
+        limits.waiting += 1
+        try:
+            await limits.semaphore.acquire()
+        finally:
+            limits.waiting -= 1
+        record_span("tool_queue", started, **{"mcp.server": server_url})
+
+        limits.active += 1
+        limits.calls += 1
+        try:
+            yield timeout
+        finally:
+            limits.active -= 1
+            limits.semaphore.release()
+
+    def timed_out(self, server_url: str, tool_name: str, timeout: float):
+        logger.warning(f"Tool {tool_name} on {server_url} timed out after {timeout:g}s")
+        limits = self._servers.get(server_url)
+        if limits is not None:
+            limits.timeouts += 1
+
+    def stats(self) -> dict:
+        """Per-server limits, calls in flight and timeouts"""
+        return {
+            server_url: {
+                "parallelism": limits.parallelism,
+                "timeout": self.limits_for(server_url)[1],
+                "active": limits.active,
+                "waiting": limits.waiting,
+                "calls": limits.calls,
+                "timeouts": limits.timeouts,
+            }
+            for server_url, limits in list(self._servers.items())
+        }
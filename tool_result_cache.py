@@ -0,0 +1,210 @@
+# tool_result_cache.py
+import asyncio
+import hashlib
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from tool_limits import ToolCallLimiter
+
+logger = logging.getLogger("strands-agent-api.tool-result-cache")
+
+# Seconds a read-only tool result is reused
+DEFAULT_TTL = int(os.environ.get("TOOL_RESULT_CACHE_TTL", "120"))
+# Maximum number of cached tool results across all servers
+DEFAULT_MAX_ENTRIES = int(os.environ.get("TOOL_RESULT_CACHE_MAX_ENTRIES", "2000"))
+# Comma-separated tool names treated as read-only in addition to those annotated readOnlyHint
+DEFAULT_ALLOWLIST = [
+    name.strip() for name in os.environ.get("TOOL_RESULT_CACHE_ALLOWLIST", "").split(",") if name.strip()
+]
+# Trust the MCP readOnlyHint annotation published by servers
+DEFAULT_USE_ANNOTATIONS = os.environ.get("TOOL_RESULT_CACHE_USE_ANNOTATIONS", "true").lower() == "true"
+
+# Upper bounds (milliseconds) of the latency histogram buckets
+LATENCY_BUCKETS_MS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+
+class ToolCallCancelled(Exception):
+    """Raised by a tool call whose agent turn was cancelled before or while it ran"""
+
+
+class ToolStats:
+    """Call counters and a latency histogram for one tool on one server"""
+
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.cancelled = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.total_ms = 0.0
+
+    def observe(self, elapsed_ms: float):
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.total_ms += elapsed_ms
+
+    def snapshot(self) -> dict:
+        served = self.hits + self.coalesced
+        histogram = {f"le_{bound}": count for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets)}
+        histogram["le_inf"] = self.buckets[-1]
+        return {
+            "calls": self.calls,
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "cancelled": self.cancelled,
+            "hit_rate": round(served / self.calls, 3) if self.calls else 0.0,
+            "avg_ms": round(self.total_ms / self.calls, 1) if self.calls else 0.0,
+            "latency_ms": histogram,
+        }
+
+
+# Longest tool name Bedrock accepts
+MAX_TOOL_NAME_LENGTH = 64
+
+
+def prefixed_tool_name(prefix: str, tool_name: str) -> str:
+    """<prefix>_<tool_name>, shortened to a length Bedrock accepts.
+
+    Long names that share their first characters would collide once cut, so a
+    shortened name ends with a hash of the full name instead.
+    """
+    name = f"{prefix}_{tool_name}"
+    if len(name) <= MAX_TOOL_NAME_LENGTH:
+        return name
+    digest = hashlib.sha1(name.encode()).hexdigest()[:8]
+    return f"{name[:MAX_TOOL_NAME_LENGTH - len(digest) - 1]}_{digest}"
+
+
+class ToolResultCache:
+    """TTL/LRU cache of read-only MCP tool results with in-flight coalescing.
+
+    A tool is read-only when its name is allowlisted or, if use_annotations is set,
+    when the server marks it with the readOnlyHint annotation. Concurrent identical
+    calls on the same event loop share a single request. Only successful results
+    are cached. Every call that reaches a server goes through limiter.
+    """
+
+    def __init__(
+        self,
+        ttl: int = DEFAULT_TTL,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        allowlist: Optional[List[str]] = None,
+        use_annotations: bool = DEFAULT_USE_ANNOTATIONS,
+        limiter: Optional[ToolCallLimiter] = None,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.allowlist = set(DEFAULT_ALLOWLIST if allowlist is None else allowlist)
+        self.use_annotations = use_annotations
+        self.limiter = limiter or ToolCallLimiter()
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[dict, float]]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, str, str], asyncio.Future] = {}
+        self._stats: Dict[Tuple[str, str], ToolStats] = {}
+        self._lock = threading.Lock()
+
+    def is_read_only(self, tool) -> bool:
+        if tool.tool_name in self.allowlist:
+            return True
+        if not self.use_annotations:
+            return False
+        annotations = tool.tool_spec.get("annotations") or {}
+        return bool(annotations.get("readOnlyHint"))
+
+    def wrap(self, server_url: str, tools: list, prefix: Optional[str] = None) -> list:
+        """Wrap a server's tools so read-only results are cached and every call is measured.
+
+        With a prefix the tools are exposed as <prefix>_<name>, so tools of several
+        servers attached to one agent do not collide.
+        """
+        # Imports Strands; deferred so the API can start before the agent stack is loaded
+        from caching_tool import CachingTool
+
+        return [
+            CachingTool(
+                tool, server_url, self, self.is_read_only(tool),
+                prefixed_tool_name(prefix, tool.tool_name) if prefix else None
+            )
+            for tool in tools
+        ]
+
+    def stats_for(self, server_url: str, tool_name: str) -> ToolStats:
+        key = (server_url, tool_name)
+        stats = self._stats.get(key)
+        if stats is None:
+            with self._lock:
+                stats = self._stats.setdefault(key, ToolStats())
+        return stats
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Tuple[str, str, str], result: dict):
+        with self._lock:
+            self._entries[key] = (result, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    async def call_once(self, key: Tuple[str, str, str], call, *args, **kwargs) -> Tuple[dict, bool]:
+        """Run call unless an identical call is already in flight; returns (result, coalesced)"""
+        loop = asyncio.get_running_loop()
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None and in_flight.get_loop() is loop:
+            try:
+                return await asyncio.shield(in_flight), True
+            except asyncio.CancelledError:
+                # Only give up if this caller was cancelled, not the one making the call
+                if not in_flight.cancelled():
+                    raise
+
+        future = loop.create_future()
+        self._in_flight[key] = future
+        try:
+            result = await call(*args, **kwargs)
+            if result is not None and result.get("status") == "success":
+                self.put(key, result)
+            future.set_result(result)
+            return result, False
+        except (asyncio.CancelledError, ToolCallCancelled):
+            # Waiters make the call themselves rather than share a cancelled result
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting
+            future.exception()
+            raise
+        finally:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def invalidate(self, server_url: Optional[str] = None):
+        """Drop cached results for server_url, or for every server when None"""
+        with self._lock:
+            if server_url is None:
+                self._entries.clear()
+            else:
+                for key in [key for key in self._entries if key[0] == server_url]:
+                    del self._entries[key]
+
+    def stats(self) -> dict:
+        """Per-tool hit rates and latency histograms, keyed by server URL and tool name"""
+        with self._lock:
+            per_tool: Dict[str, Dict[str, dict]] = {}
+            for (server_url, tool_name), stats in self._stats.items():
+                per_tool.setdefault(server_url, {})[tool_name] = stats.snapshot()
+            return {"entries": len(self._entries), "tools": per_tool}